@@ -0,0 +1,21 @@
+import os
+
+
+def get_app_data_dir():
+    """Get or create application data directory"""
+    # Create an app-specific data directory in user's home
+    if os.name == 'nt':  # Windows
+        app_data = os.path.join(os.environ['APPDATA'], 'TimeTracker')
+    else:  # macOS and Linux
+        app_data = os.path.join(os.path.expanduser('~'), '.timetracker')
+
+    # Create directory if it doesn't exist
+    if not os.path.exists(app_data):
+        os.makedirs(app_data)
+
+    return app_data
+
+
+def crm_data_path(app_data_dir):
+    """Where the selected CRM workbook is kept inside the app data directory"""
+    return os.path.join(app_data_dir, "crm_data.xlsx")
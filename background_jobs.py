@@ -0,0 +1,89 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobRunner:
+    """Run blocking work (file I/O, workbook parsing, exports) off the Tk event thread
+
+    Jobs run one at a time, in submission order, on a single worker thread,
+    so e.g. a save submitted before an export is on disk before the export
+    reads it. Progress and completion callbacks are delivered back on the
+    Tk thread by polling a queue with root.after while jobs are pending.
+    """
+
+    def __init__(self, root, on_status=None, poll_interval_ms=50):
+        self.root = root
+        # Called on the Tk thread with a status message while busy, None when idle
+        self.on_status = on_status
+        self.poll_interval_ms = poll_interval_ms
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job")
+        self._events = queue.Queue()
+        self._poll_job = None
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, status=None):
+        """Run func(*args) on the worker thread
+
+        on_done(result) or on_error(exception) is called on the Tk thread once
+        it finishes. If on_progress is given, func also gets a `progress`
+        keyword argument; every progress(message) call is forwarded to
+        on_progress(message) on the Tk thread.
+        """
+        kwargs = {}
+        if on_progress is not None:
+            kwargs['progress'] = lambda message: self._events.put((on_progress, message))
+
+        def run():
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._events.put((self._finish, (on_error, e, True)))
+            else:
+                self._events.put((self._finish, (on_done, result, False)))
+
+        self.pending += 1
+        if status and self.on_status:
+            self.on_status(status)
+        self._executor.submit(run)
+        if self._poll_job is None:
+            self._poll_job = self.root.after(self.poll_interval_ms, self._poll)
+
+    def shutdown(self, run_callbacks=False):
+        """Wait for submitted jobs to finish, dropping their callbacks unless run_callbacks is set
+
+        With run_callbacks the callbacks still due are called right away, on
+        the calling (Tk) thread.
+        """
+        self._executor.shutdown(wait=True)
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        if run_callbacks:
+            self._run_callbacks()
+
+    def _run_callbacks(self):
+        """Call every queued callback"""
+        while True:
+            try:
+                callback, value = self._events.get_nowait()
+            except queue.Empty:
+                break
+            callback(value)
+
+    def _poll(self):
+        self._run_callbacks()
+        if self.pending:
+            self._poll_job = self.root.after(self.poll_interval_ms, self._poll)
+        else:
+            self._poll_job = None
+
+    def _finish(self, outcome):
+        callback, value, failed = outcome
+        self.pending -= 1
+        if not self.pending and self.on_status:
+            self.on_status(None)
+        if callback is not None:
+            callback(value)
+        elif failed:
+            # Nobody handles it, surface it like any other Tk callback error
+            self.root.report_callback_exception(type(value), value, value.__traceback__)
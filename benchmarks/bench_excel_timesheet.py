@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Time the formatted team timesheet workbook, reused row templates vs styling every cell
+
+Usage: python benchmarks/bench_excel_timesheet.py [--users N] [--weeks N] [--activities N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+import timesheet_excel
+from reports import SUMMARY_TOTAL_COLUMN, split_iso_weeks
+from team_report import USER_TOTAL_LABEL, team_weekly_grid
+
+
+class PerCellRow:
+    """The RowTemplate interface, creating and styling new cells for every row"""
+
+    def __init__(self, worksheet, styles):
+        self.worksheet = worksheet
+        self.styles = styles
+
+    def append(self, values):
+        cells = []
+        for style, value in zip(self.styles, values):
+            cell = WriteOnlyCell(self.worksheet, value=value)
+            if style is not None:
+                cell.style = style
+            cells.append(cell)
+        self.worksheet.append(cells)
+
+
+def team_totals(users, weeks, activities):
+    """Totals frame as aggregate_team returns it: every user logs every activity on every day"""
+    end_date = datetime.now().date()
+    rows = []
+    for day in range(weeks * 7):
+        date = (end_date - timedelta(days=day)).isoformat()
+        for user in range(users):
+            for activity in range(activities):
+                rows.append((f"user{user:04d}", date, f"Activity {activity}", f"zcrm_{activity}",
+                             f"Deal {activity}", 600 + (user * 7 + activity * 13 + day) % 3000))
+    return pd.DataFrame(rows, columns=['User', 'Date', 'Activity', 'Record Id', 'Deal Name', 'Duration (seconds)'])
+
+
+def write_workbook(grids, path):
+    workbook = Workbook(write_only=True)
+    for name, grid in grids:
+        timesheet_excel.write_team_timesheet(workbook, name, grid, SUMMARY_TOTAL_COLUMN, USER_TOTAL_LABEL)
+    workbook.save(path)
+
+
+def measure(grids, path):
+    """(seconds, peak traced MiB) of writing the workbook; memory is traced in a second, untimed run"""
+    started = time.perf_counter()
+    write_workbook(grids, path)
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    write_workbook(grids, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--activities", type=int, default=8)
+    args = parser.parse_args()
+
+    totals = team_totals(args.users, args.weeks, args.activities)
+    grids = [(f"Team {year}-W{week:02d}", team_weekly_grid(week_df))
+             for (year, week), week_df in split_iso_weeks(totals)]
+    rows = sum(len(user_rows) + 2 for _, grid in grids for _, user_rows in grid.users)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        template_time, template_peak = measure(grids, os.path.join(out_dir, "templates.xlsx"))
+        row_template = timesheet_excel.RowTemplate
+        timesheet_excel.RowTemplate = PerCellRow
+        try:
+            per_cell_time, per_cell_peak = measure(grids, os.path.join(out_dir, "per_cell.xlsx"))
+        finally:
+            timesheet_excel.RowTemplate = row_template
+
+    print(f"{'sheets':>7} {'rows':>8} {'per cell (s)':>13} {'templates (s)':>14} {'speedup':>8} "
+          f"{'peak MiB':>9} {'per cell MiB':>13}")
+    print(f"{len(grids):>7} {rows:>8} {per_cell_time:>13.2f} {template_time:>14.2f} "
+          f"{per_cell_time / template_time:>7.1f}x {template_peak:>9.1f} {per_cell_peak:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
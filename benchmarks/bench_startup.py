@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Import-time profile of the app's startup path
+
+Runs a fresh interpreter with `python -X importtime` that imports
+time-tracker.py without starting the GUI, and reports the cumulative
+import time of the slowest modules. Heavy data modules (pandas, numpy,
+openpyxl) must stay off this path; --check fails if any of them show up.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--top N] [--check]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time-tracker.py as a module so the `if __name__ == "__main__"` block doesn't run
+STARTUP_CODE = "import runpy; runpy.run_path('time-tracker.py', run_name='startup_benchmark')"
+
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_once():
+    """(total seconds, {module: cumulative microseconds}) for one cold start"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        cumulative[module] = int(cumulative_us)
+        if len(indent) == 1:
+            # Top-level import, its cumulative time includes everything below it
+            total_us += int(cumulative_us)
+    return total_us / 1e6, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--check", action="store_true",
+                        help="exit with an error if a heavy module is imported at startup")
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.repeat):
+        total, cumulative = profile_once()
+        totals.append(total)
+
+    print(f"startup imports: median {statistics.median(totals) * 1000:.1f} ms, "
+          f"min {min(totals) * 1000:.1f} ms over {args.repeat} runs")
+    print("\nslowest modules (cumulative, last run):")
+    for module, cumulative_us in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+    heavy = sorted(m for m in cumulative if m.split('.')[0] in HEAVY_MODULES)
+    if heavy:
+        print(f"\nheavy modules imported at startup: {', '.join(heavy[:10])}")
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
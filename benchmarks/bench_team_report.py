@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Time the team report over synthetic per-user log stores, serial vs process pool
+
+Usage: python benchmarks/bench_team_report.py [--users N] [--logs-per-user N] [--days N] [--workers N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import synthetic_deals, synthetic_logs, write_log_snapshot
+
+from team_report import aggregate_team, build_team_weekly_summary
+
+
+def write_user_store(store_dir, count, days, seed):
+    """A snapshot of `count` random logs spread over the `days` days up to now"""
+    write_log_snapshot(store_dir, synthetic_logs(count, synthetic_deals(40, seed), days=days, seed=seed))
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logs-per-user", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as team_dir:
+        print(f"Generating {args.users} stores of {args.logs_per_user} logs over {args.days} days...")
+        for user in range(args.users):
+            write_user_store(os.path.join(team_dir, f"user{user:04d}"), args.logs_per_user, args.days, user)
+
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=args.days)
+        serial_time, (expected, _) = timed(lambda: aggregate_team(team_dir, start_date, end_date, max_workers=1))
+        pool_time, (actual, errors) = timed(
+            lambda: aggregate_team(team_dir, start_date, end_date, max_workers=args.workers))
+        if errors:
+            raise SystemExit("\n".join(errors))
+
+        key = ['User', 'Date', 'Activity', 'Record Id']
+        expected = expected.sort_values(key, ignore_index=True)
+        actual = actual.sort_values(key, ignore_index=True)
+        if not expected.astype(str).equals(actual.astype(str)):
+            raise SystemExit("Serial and pooled totals differ")
+        summary_time, _ = timed(lambda: build_team_weekly_summary(actual))
+
+        print(f"{'logs':>10} {'serial (s)':>11} {'pool (s)':>9} {'speedup':>8} {'summary (s)':>12}")
+        print(f"{args.users * args.logs_per_user:>10} {serial_time:>11.2f} {pool_time:>9.2f} "
+              f"{serial_time / pool_time:>7.1f}x {summary_time:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Compare the old per-log weekly summary with the vectorized one
+
+Usage: python benchmarks/bench_weekly_summary.py [number of logs ...]
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_columns import LogColumns
+from reports import build_weekly_summary
+
+ACTIVITIES = [
+    "Solution Innovation and Improvement",
+    "Client and Partner Engagement",
+    "Solution Design and Architecture",
+    "Proposal Support",
+    "Solution Documentation",
+    "Internal Meetings",
+    "Training and Development",
+    "Administrative Tasks"
+]
+
+
+def legacy_weekly_summary(logs):
+    """The weekly summary as it was computed before vectorization, one log at a time"""
+    dates = [datetime.strptime(log['Date'], '%Y-%m-%d').date() for log in logs]
+    min_date = min(dates)
+    start_of_week = min_date - timedelta(days=min_date.weekday())
+    date_range = [start_of_week + timedelta(days=i) for i in range(7)]
+    date_headers = [f"{d.strftime('%b').upper()} {d.day}" for d in date_range]
+
+    activity_time = defaultdict(lambda: defaultdict(int))
+    for log in logs:
+        activity = log['Activity']
+        log_date = datetime.strptime(log['Date'], '%Y-%m-%d').date()
+        weekday_idx = (log_date - start_of_week).days
+        if 0 <= weekday_idx < 7:
+            activity_time[activity][weekday_idx] += log['Duration (seconds)']
+
+    data = []
+    daily_totals = [0] * 7
+    for activity, day_durations in activity_time.items():
+        for day_idx, duration in day_durations.items():
+            daily_totals[day_idx] += duration
+
+    attendance_row = ['ATTENDANCE HOURS']
+    for day_total in daily_totals:
+        hours = day_total // 3600
+        minutes = (day_total % 3600) // 60
+        attendance_row.append(f"{hours}h {minutes}m" if day_total > 0 else "0h 0m")
+    attendance_row.append("")
+    data.append(attendance_row)
+    data.append([""] * 9)
+
+    for activity in sorted(activity_time.keys()):
+        row = [activity]
+        total_activity_seconds = 0
+        for day_idx in range(7):
+            duration_seconds = activity_time[activity].get(day_idx, 0)
+            total_activity_seconds += duration_seconds
+            if duration_seconds > 0:
+                hours = duration_seconds // 3600
+                minutes = (duration_seconds % 3600) // 60
+                row.append(f"{hours}:{minutes:02d}")
+            else:
+                row.append("0:00")
+        hours = total_activity_seconds // 3600
+        minutes = (total_activity_seconds % 3600) // 60
+        row.append(f"{hours}:{minutes:02d}")
+        data.append(row)
+        data.append(["COMMENT"] + [""] * 8)
+
+    weekly_total_seconds = sum(daily_totals)
+    hours = weekly_total_seconds // 3600
+    minutes = (weekly_total_seconds % 3600) // 60
+    totals_row = ["Total hours/day"]
+    for day_total in daily_totals:
+        hours_day = day_total // 3600
+        minutes_day = (day_total % 3600) // 60
+        totals_row.append(f"{hours_day}:{minutes_day:02d}")
+    totals_row.append(f"{hours}:{minutes:02d}")
+    data.append(totals_row)
+
+    columns = ['PROJECTS'] + date_headers + ['TASK TOTAL\nHRS/WEEK']
+    return pd.DataFrame(data, columns=columns)
+
+
+def synthetic_logs(count, days=120, seed=0):
+    """Random logs spread over the `days` days up to today"""
+    rng = random.Random(seed)
+    today = date.today()
+    logs = []
+    for _ in range(count):
+        day = today - timedelta(days=rng.randrange(days))
+        logs.append({
+            'Date': day.isoformat(),
+            'Activity': rng.choice(ACTIVITIES),
+            'Duration (seconds)': rng.randrange(0, 4 * 3600),
+        })
+    return logs
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main(sizes):
+    print(f"{'logs':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>8}")
+    for size in sizes:
+        logs = synthetic_logs(size)
+        logs_df = LogColumns.from_records(logs).to_frame()
+        legacy_time, expected = best_of(lambda: legacy_weekly_summary(logs))
+        new_time, actual = best_of(lambda: build_weekly_summary(logs_df))
+        if not expected.equals(actual):
+            raise SystemExit(f"Summaries differ for {size} logs")
+        print(f"{size:>10} {legacy_time:>12.4f} {new_time:>15.4f} {legacy_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Benchmark the tracker's hot paths on synthetic data and report JSON
+
+For every history size it generates a CRM workbook and a time log
+history, then times:
+
+    load_time_logs      opening the log store (journal manifest and current month, or SQLite)
+    save_time_logs      appending one log (mean over --appends appends)
+    load_crm_data       parsing the CRM workbook (cold) and reading its cache (warm)
+    deal_index          building the Record Id / search index
+    opportunity_lookup  the Opportunity label -> deal lookup stop_timer does (mean per call)
+    export_logs         daily and weekly CSV and Excel exports
+    weekly_summary      build_weekly_summary over the whole history
+
+The JSON report (with the git commit it was run on) goes to stdout or
+--out, and a readable table to stderr, so reports saved over time can be
+compared:
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 1000000 --out bench.json
+
+Usage: python benchmarks/run_benchmarks.py [--sizes N ...] [--engine journal|sqlite ...]
+                                           [--deals N] [--days N] [--repeat N] [--out FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import synthetic_logs, write_crm_workbook, write_log_snapshot
+
+from crm_cache import load_crm_frame
+from deal_index import DealIndex, format_opportunity, parse_opportunity
+from log_store import open_log_store
+from reports import build_weekly_summary, export_period, write_export
+
+
+def best_of(func, repeat):
+    """(fastest seconds, last result) over `repeat` runs of func"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_crm(work_dir, args, record):
+    """CRM workbook load (cold and cached), index build and stop_timer's lookup"""
+    crm_file = os.path.join(work_dir, "crm_data.xlsx")
+    deals = write_crm_workbook(crm_file, args.deals)
+
+    def cold_load():
+        for name in os.listdir(work_dir):
+            if name.startswith("crm_data.cache"):
+                os.remove(os.path.join(work_dir, name))
+        return load_crm_frame(crm_file)
+
+    seconds, _ = best_of(cold_load, args.repeat)
+    record("load_crm_data", seconds, variant="cold", deals=args.deals)
+    seconds, df = best_of(lambda: load_crm_frame(crm_file), args.repeat)
+    record("load_crm_data", seconds, variant="cached", deals=args.deals)
+
+    seconds, index = best_of(lambda: DealIndex(df), args.repeat)
+    record("deal_index", seconds, deals=args.deals)
+
+    labels = [format_opportunity(deal_name, record_id) for record_id, deal_name, _, _ in deals]
+
+    def lookups():
+        for label in labels:
+            _, record_id = parse_opportunity(label)
+            index.lookup(record_id)
+
+    seconds, _ = best_of(lookups, args.repeat)
+    record("opportunity_lookup", seconds / len(labels), deals=args.deals, unit="seconds per call")
+    return deals
+
+
+def bench_logs(work_dir, size, engine, deals, args, record):
+    """Log store load/append, exports and weekly summary for a history of `size` logs"""
+    data_dir = os.path.join(work_dir, f"{engine}_{size}")
+    write_log_snapshot(data_dir, synthetic_logs(size, deals, days=args.days, seed=size))
+    # The first open archives the older months (journal) or imports the snapshot (SQLite),
+    # which is a one-time migration rather than a load
+    store = open_log_store(data_dir, engine=engine)
+    store.load()
+    store.close()
+
+    def load():
+        store = open_log_store(data_dir, engine=engine, read_only=True)
+        store.load()
+        return store
+
+    seconds, store = best_of(load, args.repeat)
+    record("load_time_logs", seconds, engine=engine, size=size)
+    store.close()
+
+    store = open_log_store(data_dir, engine=engine)
+    store.load()
+    try:
+        new_logs = list(synthetic_logs(args.appends, deals, days=1, seed=-size))
+        started = time.perf_counter()
+        for log in new_logs:
+            store.append(log)
+        record("save_time_logs", (time.perf_counter() - started) / len(new_logs), engine=engine, size=size,
+               unit="seconds per call")
+
+        for period in ("daily", "weekly"):
+            start_date, end_date, _ = export_period(period)
+            rows = store.count_range(start_date, end_date)
+            for format_type, extension in (("csv", ".csv"), ("excel", ".xlsx")):
+                file_path = os.path.join(work_dir, f"export_{period}{extension}")
+                seconds, _ = best_of(
+                    lambda: write_export(store.iter_range(start_date, end_date), file_path, format_type),
+                    args.repeat)
+                record("export_logs", seconds, engine=engine, size=size, period=period, format=format_type,
+                       rows=rows)
+
+        today = datetime.now().date()
+        logs_df = store.range(today - timedelta(days=args.days + 1), today).to_frame()
+        seconds, _ = best_of(lambda: build_weekly_summary(logs_df), args.repeat)
+        record("weekly_summary", seconds, engine=engine, size=size)
+    finally:
+        store.close()
+    shutil.rmtree(data_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tracker's hot paths on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="time log history sizes (default: 1000 100000 1000000)")
+    parser.add_argument("--engine", dest="engines", choices=["journal", "sqlite"], action="append",
+                        help="storage engine(s) to benchmark (default: journal)")
+    parser.add_argument("--deals", type=int, default=5000, help="deals in the CRM workbook (default: 5000)")
+    parser.add_argument("--days", type=int, default=3 * 365, help="days of history (default: 1095)")
+    parser.add_argument("--appends", type=int, default=200, help="appends timed for save_time_logs")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest counts")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+
+    def record(benchmark, seconds, **labels):
+        labels.setdefault("unit", "seconds")
+        results.append(dict(benchmark=benchmark, seconds=round(seconds, 6), **labels))
+        details = " ".join(f"{key}={value}" for key, value in labels.items() if key != "unit")
+        print(f"{benchmark:<20} {seconds:>12.6f}  {details}", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        deals = bench_crm(work_dir, args, record)
+        for engine in args.engines or ["journal"]:
+            for size in args.sizes:
+                bench_logs(work_dir, size, engine, deals, args, record)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'deals': args.deals, 'days': args.days, 'appends': args.appends, 'repeat': args.repeat},
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
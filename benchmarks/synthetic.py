@@ -0,0 +1,102 @@
+"""Synthetic CRM workbooks and time log histories for the benchmarks
+
+Everything is seeded, so the same arguments always produce the same data.
+"""
+import json
+import os
+import random
+from datetime import datetime
+
+ACTIVITIES = [
+    "Solution Innovation and Improvement",
+    "Client and Partner Engagement",
+    "Solution Design and Architecture",
+    "Proposal Support",
+    "Solution Documentation",
+    "Internal Meetings",
+    "Training and Development",
+    "Administrative Tasks"
+]
+
+ROLES = ["Pre-Sales", "Solution Architect", "Technical Consultant"]
+
+WORDS = ["Cloud", "Data", "Platform", "Migration", "Analytics", "Security", "Modernization",
+         "Retail", "Banking", "Logistics", "Pilot", "Renewal", "Expansion", "Assessment"]
+
+
+def record_id(number):
+    """Record Id in the shape the CRM exports them"""
+    return f"zcrm_{4876543000000000000 + number}"
+
+
+def synthetic_deals(count, seed=0):
+    """List of (Record Id, Deal Name, Company, Deal Owner) tuples"""
+    rng = random.Random(seed)
+    owners = [f"Owner {i}" for i in range(max(1, count // 200))]
+    companies = [f"Company {i}" for i in range(max(1, count // 4))]
+    return [
+        (record_id(number),
+         f"{rng.choice(WORDS)} {rng.choice(WORDS)} {number}",
+         rng.choice(companies),
+         rng.choice(owners))
+        for number in range(count)
+    ]
+
+
+def write_crm_workbook(path, count, seed=0):
+    """Write a CRM workbook with the required columns and `count` deals"""
+    import pandas as pd
+
+    deals = synthetic_deals(count, seed)
+    df = pd.DataFrame(deals, columns=['Record Id', 'Deal Name', 'Company Name (Company Name)', 'Deal Owner'])
+    # Real exports carry more columns than the app needs
+    df['Stage'] = "Qualification"
+    df['Amount'] = 10000.0
+    df.to_excel(path, index=False)
+    return deals
+
+
+def synthetic_logs(count, deals, days=365, seed=0, end=None):
+    """Yield `count` time logs over the `days` days up to end (default now), in time order"""
+    rng = random.Random(seed)
+    end = (end or datetime.now()).timestamp()
+    span = days * 86400.0
+    # Sorted uniform timestamps without materializing them all: exponential gaps
+    timestamp = end - span
+    for remaining in range(count, 0, -1):
+        timestamp += (end - timestamp) * (1 - rng.random() ** (1.0 / remaining))
+        deal_id, deal_name, company, owner = rng.choice(deals)
+        duration = rng.randrange(60, 4 * 3600)
+        stopped = datetime.fromtimestamp(timestamp)
+        started = datetime.fromtimestamp(timestamp - duration)
+        yield {
+            'Date': stopped.strftime('%Y-%m-%d'),
+            'Timestamp': timestamp,
+            'Record Id': deal_id,
+            'Deal Name': deal_name,
+            'Company Name': company,
+            'Deal Owner': owner,
+            'Role': rng.choice(ROLES),
+            'Activity': rng.choice(ACTIVITIES),
+            'Comment': "",
+            'Start Time': started.strftime('%H:%M:%S'),
+            'End Time': stopped.strftime('%H:%M:%S'),
+            'Duration (seconds)': duration,
+            'Segments': [[round(timestamp - duration, 3), float(duration)]],
+        }
+
+
+def write_log_snapshot(data_dir, logs):
+    """Write logs as a journal store snapshot in data_dir, streaming them one at a time"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, "time_logs_data.json")
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"format": 2, "logs": [')
+        for log in logs:
+            if count:
+                f.write(", ")
+            f.write(json.dumps(log))
+            count += 1
+        f.write(f'], "seq": {count}}}')
+    return path
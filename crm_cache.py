@@ -0,0 +1,144 @@
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import warnings
+
+from instrumentation import timed
+
+REQUIRED_COLUMNS = ['Record Id', 'Deal Name', 'Company Name (Company Name)', 'Deal Owner']
+
+
+class InvalidCRMFile(ValueError):
+    """A CRM workbook is missing required columns"""
+
+    def __init__(self, missing_columns):
+        self.missing_columns = missing_columns
+        super().__init__(f"The selected file is missing the following required columns: {', '.join(missing_columns)}")
+
+
+@timed("crm.import")
+def import_crm_file(file_path, crm_data_file):
+    """Validate a CRM workbook, copy it to crm_data_file and cache it; returns the frame"""
+    df = read_crm_workbook(file_path)
+
+    # Validate that it has the required columns
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise InvalidCRMFile(missing_columns)
+
+    if os.path.abspath(file_path) != os.path.abspath(crm_data_file):
+        os.makedirs(os.path.dirname(crm_data_file) or '.', exist_ok=True)
+        shutil.copy(file_path, crm_data_file)
+    save_crm_cache(crm_data_file, df)
+    return df
+
+
+@timed("crm.load")
+def load_crm_frame(xlsx_path):
+    """Load a CRM workbook, reusing the binary cache next to it when the workbook is unchanged
+
+    The cache is keyed by the workbook's mtime and size, falling back to a
+    content hash so a copy or touch of an identical file still hits it.
+    Only a real change to the workbook triggers a new openpyxl parse.
+    """
+    meta = _read_meta(xlsx_path)
+    if meta is not None and _cache_is_current(xlsx_path, meta):
+        try:
+            return _read_cache(meta)
+        except Exception:
+            pass  # Unreadable cache, rebuild it from the workbook below
+
+    df = read_crm_workbook(xlsx_path)
+    save_crm_cache(xlsx_path, df)
+    return df
+
+
+def read_crm_workbook(xlsx_path):
+    """Parse a CRM workbook into a DataFrame"""
+    import pandas as pd
+
+    with warnings.catch_warnings():
+        # CRM exports (and the bundled sample) often have no default cell style; openpyxl falls back to
+        # its own, which doesn't affect the values read, but it would warn about it on every import
+        warnings.filterwarnings("ignore", message="Workbook contains no default style", category=UserWarning)
+        return pd.read_excel(xlsx_path)
+
+
+def save_crm_cache(xlsx_path, df):
+    """Store an already parsed CRM frame as the cache for xlsx_path"""
+    cache_format = _cache_format()
+    cache_file = _cache_base(xlsx_path) + (".feather" if cache_format == "feather" else ".pkl")
+    tmp_file = cache_file + ".tmp"
+    try:
+        if cache_format == "feather":
+            df.reset_index(drop=True).to_feather(tmp_file)
+        else:
+            df.to_pickle(tmp_file, protocol=5)
+        os.replace(tmp_file, cache_file)
+        stat = os.stat(xlsx_path)
+        _write_meta(xlsx_path, {
+            'format': cache_format,
+            'cache_file': cache_file,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': _file_hash(xlsx_path),
+        })
+    except Exception:
+        # The cache is only an optimization, the workbook itself is still valid
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def _cache_is_current(xlsx_path, meta):
+    if not os.path.exists(meta.get('cache_file', '')):
+        return False
+    stat = os.stat(xlsx_path)
+    if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return True
+    if meta.get('size') == stat.st_size and meta.get('sha256') == _file_hash(xlsx_path):
+        # Same contents with a new mtime, just refresh the key
+        _write_meta(xlsx_path, dict(meta, mtime_ns=stat.st_mtime_ns))
+        return True
+    return False
+
+
+def _cache_base(xlsx_path):
+    return os.path.splitext(xlsx_path)[0] + ".cache"
+
+
+def _cache_format():
+    # Feather can be memory-mapped, but needs the optional pyarrow package
+    return "feather" if importlib.util.find_spec("pyarrow") is not None else "pickle"
+
+
+def _read_cache(meta):
+    if meta['format'] == "feather":
+        from pyarrow import feather
+        return feather.read_feather(meta['cache_file'], memory_map=True)
+    import pandas as pd
+    return pd.read_pickle(meta['cache_file'])
+
+
+def _read_meta(xlsx_path):
+    try:
+        with open(_cache_base(xlsx_path) + ".json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(xlsx_path, meta):
+    meta_file = _cache_base(xlsx_path) + ".json"
+    with open(meta_file + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(meta_file + ".tmp", meta_file)
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,188 @@
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+def normalize_record_id(value):
+    """Canonical string form of a Record Id, whatever dtype pandas read the column as"""
+    if value is None:
+        return ""
+    if hasattr(value, 'item'):
+        # numpy scalar (e.g. int64 from an all-numeric column)
+        value = value.item()
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        if value.is_integer():
+            value = int(value)
+    return str(value).strip()
+
+
+def format_opportunity(deal_name, record_id):
+    """Label shown in the Opportunity combobox"""
+    return f"{deal_name} ({record_id})"
+
+
+def parse_opportunity(label):
+    """Split a combobox label back into (deal_name, record_id)"""
+    deal_name, _, record_id = label.rpartition(' (')
+    if not deal_name:
+        # Free text without a Record Id
+        return label.strip(), ""
+    return deal_name.strip(), normalize_record_id(record_id.rstrip(')'))
+
+
+def deals_from_frame(df):
+    """Record Id -> (Deal Name, Company, Deal Owner) for the rows of a CRM frame"""
+    deals = {}
+    rows = zip(
+        df['Record Id'].tolist(),
+        df['Deal Name'].tolist(),
+        df['Company Name (Company Name)'].tolist(),
+        df['Deal Owner'].tolist(),
+    )
+    for record_id, deal_name, company, owner in rows:
+        key = normalize_record_id(record_id)
+        # Keep the first row for duplicated ids, like the old row lookup did
+        if key and key not in deals:
+            deals[key] = (deal_name, company, owner)
+    return deals
+
+
+def _same_deal(old, new):
+    # Empty cells are NaN, which never equals itself
+    return all(a == b or (a != a and b != b) for a, b in zip(old, new))
+
+
+class CRMChanges:
+    """Differences between two deal sets, by Record Id"""
+
+    def __init__(self, inserted, updated, deleted):
+        self.inserted = inserted  # Record Id -> deal, for new deals
+        self.updated = updated  # Record Id -> new deal, for changed deals
+        self.deleted = deleted  # Record Ids no longer in the CRM data
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def summary(self):
+        return (f"{len(self.inserted)} new, {len(self.updated)} changed "
+                f"and {len(self.deleted)} removed deals")
+
+
+def diff_deals(old_deals, new_deals):
+    """CRMChanges turning old_deals into new_deals (both as built by deals_from_frame)"""
+    inserted = {}
+    updated = {}
+    for record_id, deal in new_deals.items():
+        old = old_deals.get(record_id)
+        if old is None:
+            inserted[record_id] = deal
+        elif not _same_deal(old, deal):
+            updated[record_id] = deal
+    deleted = [record_id for record_id in old_deals if record_id not in new_deals]
+    return CRMChanges(inserted, updated, deleted)
+
+
+class DealIndex:
+    """Record Id -> (Deal Name, Company, Deal Owner) lookup built once per CRM file
+
+    Also holds a search index over Deal Name, Company and Record Id for the
+    type-ahead Opportunity picker: a sorted word list for prefix matches and
+    lowercased rows for substring matches.
+
+    apply() updates both in place for a CRM refresh. Removed deals leave
+    an empty slot behind, until enough of them pile up to rebuild.
+    """
+
+    def __init__(self, df):
+        self.deals = deals_from_frame(df)
+        self._build_search_index()
+
+    def _build_search_index(self):
+        self._positions = {}
+        self._labels = []
+        self._haystack = []
+        self._free = 0
+        tokens = []
+        for position, (record_id, (deal_name, company, _)) in enumerate(self.deals.items()):
+            self._positions[record_id] = position
+            self._labels.append(format_opportunity(deal_name, record_id))
+            text = f"{deal_name} {company} {record_id}".lower()
+            self._haystack.append(text)
+            tokens.extend((word, position) for word in set(text.split()))
+        tokens.sort()
+        self._tokens = tokens
+
+    def apply(self, changes):
+        """Apply CRMChanges to the deals and the search index
+
+        New deals are added after the existing ones, so they come last
+        among equally good matches until the next full load.
+        """
+        for record_id in changes.deleted:
+            if record_id in self.deals:
+                del self.deals[record_id]
+                self._unindex(self._positions.pop(record_id))
+                self._free += 1
+        for record_id, deal in list(changes.updated.items()) + list(changes.inserted.items()):
+            position = self._positions.get(record_id)
+            if position is None:
+                position = len(self._labels)
+                self._positions[record_id] = position
+                self._labels.append(None)
+                self._haystack.append("")
+            else:
+                self._unindex(position)
+            self.deals[record_id] = deal
+            self._index(position, record_id, deal)
+        if self._free > len(self._labels) // 2:
+            self._build_search_index()
+
+    def _index(self, position, record_id, deal):
+        deal_name, company, _ = deal
+        self._labels[position] = format_opportunity(deal_name, record_id)
+        text = f"{deal_name} {company} {record_id}".lower()
+        self._haystack[position] = text
+        for word in set(text.split()):
+            insort(self._tokens, (word, position))
+
+    def _unindex(self, position):
+        for word in set(self._haystack[position].split()):
+            del self._tokens[bisect_left(self._tokens, (word, position))]
+        self._labels[position] = None
+        self._haystack[position] = ""
+
+    def __len__(self):
+        return len(self.deals)
+
+    def lookup(self, record_id):
+        """(Deal Name, Company, Deal Owner) for record_id, or None if unknown"""
+        return self.deals.get(normalize_record_id(record_id))
+
+    def search(self, query, limit=50):
+        """Labels of up to `limit` deals matching every word of query
+
+        Deals with a word starting with the query come first, followed by
+        deals that merely contain it, each group in CRM file order.
+        """
+        words = query.lower().split()
+        if not words:
+            return list(islice((label for label in self._labels if label is not None), limit))
+        first, rest = words[0], words[1:]
+
+        prefix_matches = set()
+        index = bisect_left(self._tokens, (first,))
+        while index < len(self._tokens) and self._tokens[index][0].startswith(first):
+            position = self._tokens[index][1]
+            if all(word in self._haystack[position] for word in rest):
+                prefix_matches.add(position)
+            index += 1
+
+        matches = sorted(prefix_matches)[:limit]
+        if len(matches) < limit:
+            for position, text in enumerate(self._haystack):
+                if position not in prefix_matches and all(word in text for word in words):
+                    matches.append(position)
+                    if len(matches) == limit:
+                        break
+        return [self._labels[position] for position in matches]
@@ -0,0 +1,272 @@
+"""Opt-in timing of the app's major operations
+
+Set TIMETRACKER_METRICS=1 to record how long startup phases, CRM loads,
+saves, exports and summary builds take. Every timed operation is appended
+as one JSON line to metrics.jsonl in the app data directory (rotated at
+1 MB, keeping 3 old files), and each session ends with a line holding its
+counts and latency histograms. `python timetracker_cli.py metrics`
+summarizes them.
+
+To see where a slow operation spends its time, also set
+TIMETRACKER_PROFILE=<operation>[:<min ms>], e.g. TIMETRACKER_PROFILE=logs.save:500
+for the save that Stop runs in the background (ui.stop only times the part
+on the window's thread). The next run of that operation taking at least
+min ms (default 0) is captured with cProfile and dumped to
+profile-<operation>-<time>.prof next to the metrics, which
+`python -m pstats` can read.
+
+When metrics are off, timed operations cost one global lookup.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_ENV_VAR = "TIMETRACKER_METRICS"
+PROFILE_ENV_VAR = "TIMETRACKER_PROFILE"
+METRICS_FILE = "metrics.jsonl"
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+
+# Upper bounds (ms) of the latency histogram buckets, plus one open-ended bucket
+HISTOGRAM_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+# The active recorder, None while metrics are off
+_recorder = None
+
+
+def metrics_enabled(environ=None):
+    """Whether TIMETRACKER_METRICS asks for metrics to be recorded"""
+    environ = os.environ if environ is None else environ
+    return environ.get(METRICS_ENV_VAR, "").lower() not in ("", "0", "false", "no", "off")
+
+
+def configure(data_dir, environ=None):
+    """Start recording metrics to data_dir if TIMETRACKER_METRICS is set; returns whether it is on"""
+    global _recorder
+    environ = os.environ if environ is None else environ
+    if not metrics_enabled(environ):
+        return False
+    close()
+    _recorder = MetricsRecorder(data_dir, profile=environ.get(PROFILE_ENV_VAR))
+    return True
+
+
+def close():
+    """Write the session summary and stop recording"""
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
+
+
+def record(operation, seconds):
+    """Record an operation that was timed by other means"""
+    if _recorder is not None:
+        _recorder.record(operation, seconds)
+
+
+def timed(operation):
+    """Time a block (as a context manager) or every call of a function (as a decorator)
+
+        with timed("startup.window"):
+            ...
+
+        @timed("summary.build")
+        def build_weekly_summary(logs_df):
+            ...
+    """
+    return _Timed(operation)
+
+
+class _Timed:
+    def __init__(self, operation):
+        self.operation = operation
+        self._contexts = []
+
+    def __call__(self, func):
+        operation = self.operation
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with _recorder.measure(operation):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        context = _recorder.measure(self.operation) if _recorder is not None else None
+        self._contexts.append(context)
+        if context is not None:
+            context.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        context = self._contexts.pop()
+        if context is not None:
+            return context.__exit__(*exc_info)
+        return False
+
+
+class MetricsRecorder:
+    """Counts, histograms and the rotating metrics file of one session"""
+
+    def __init__(self, data_dir, profile=None):
+        self.data_dir = data_dir
+        self.started = time.time()
+        # Forked worker processes inherit the recorder but must not write to the file
+        self.pid = os.getpid()
+        self.counts = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+        # logging is only needed with metrics on, keep it off the startup path otherwise
+        import logging
+        from logging.handlers import RotatingFileHandler
+
+        self._handler = RotatingFileHandler(os.path.join(data_dir, METRICS_FILE), maxBytes=MAX_BYTES,
+                                            backupCount=BACKUP_COUNT, encoding='utf-8')
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+        self._logger = logging.getLogger("timetracker.metrics")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.handlers = [self._handler]
+
+        # Operation to capture one cProfile dump of, and the minimum duration worth keeping
+        self.profile_operation = None
+        self.profile_min_ms = 0.0
+        self._profiling = False
+        if profile:
+            operation, _, min_ms = profile.partition(":")
+            self.profile_operation = operation.strip()
+            self.profile_min_ms = float(min_ms) if min_ms else 0.0
+
+    @contextmanager
+    def measure(self, operation):
+        if os.getpid() != self.pid:
+            yield
+            return
+        profiler = self._start_profile(operation)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                self._finish_profile(operation, profiler, elapsed)
+            self.record(operation, elapsed)
+
+    def record(self, operation, seconds):
+        ms = seconds * 1000
+        bucket = next((index for index, bound in enumerate(HISTOGRAM_BOUNDS_MS) if ms <= bound),
+                      len(HISTOGRAM_BOUNDS_MS))
+        with self._lock:
+            self.counts[operation] = self.counts.get(operation, 0) + 1
+            histogram = self.histograms.setdefault(operation, [0] * (len(HISTOGRAM_BOUNDS_MS) + 1))
+            histogram[bucket] += 1
+        self._write({'t': round(time.time(), 3), 'op': operation, 'ms': round(ms, 3),
+                     'thread': threading.current_thread().name})
+
+    def close(self):
+        if os.getpid() == self.pid:
+            self._write({'t': round(time.time(), 3), 'session': {
+                'started': round(self.started, 3),
+                'counts': self.counts,
+                'histogram_bounds_ms': HISTOGRAM_BOUNDS_MS,
+                'histograms': self.histograms,
+            }})
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+    def _write(self, entry):
+        try:
+            self._logger.info(json.dumps(entry))
+        except Exception:
+            pass  # Metrics must never break the app
+
+    def _start_profile(self, operation):
+        with self._lock:
+            if operation != self.profile_operation or self._profiling:
+                return None
+            self._profiling = True
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter
+            with self._lock:
+                self._profiling = False
+            return None
+        return profiler
+
+    def _finish_profile(self, operation, profiler, elapsed):
+        profiler.disable()
+        if elapsed * 1000 >= self.profile_min_ms:
+            path = os.path.join(self.data_dir,
+                                f"profile-{operation}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.prof")
+            profiler.dump_stats(path)
+            self._write({'t': round(time.time(), 3), 'op': operation, 'profile': path})
+            with self._lock:
+                # Only a single dump is taken per session
+                self.profile_operation = None
+        with self._lock:
+            self._profiling = False
+
+
+def read_metrics(data_dir):
+    """Yield the entries of the metrics file and its backups, oldest first"""
+    base = os.path.join(data_dir, METRICS_FILE)
+    for path in [f"{base}.{index}" for index in range(BACKUP_COUNT, 0, -1)] + [base]:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize_metrics(data_dir):
+    """(per-operation stats, profile dump paths) over all recorded metrics
+
+    The stats are dicts with operation, count, mean/p50/p95/max in ms and
+    histogram counts per HISTOGRAM_BOUNDS_MS bucket, slowest mean first.
+    """
+    latencies = {}
+    profiles = []
+    for entry in read_metrics(data_dir):
+        if 'profile' in entry:
+            profiles.append(entry['profile'])
+        elif 'ms' in entry:
+            latencies.setdefault(entry['op'], []).append(entry['ms'])
+
+    stats = []
+    for operation, values in latencies.items():
+        values.sort()
+        histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for ms in values:
+            histogram[next((index for index, bound in enumerate(HISTOGRAM_BOUNDS_MS) if ms <= bound),
+                           len(HISTOGRAM_BOUNDS_MS))] += 1
+        stats.append({
+            'operation': operation,
+            'count': len(values),
+            'mean_ms': sum(values) / len(values),
+            'p50_ms': values[(len(values) - 1) // 2],
+            'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))],
+            'max_ms': values[-1],
+            'histogram': histogram,
+        })
+    stats.sort(key=lambda stat: stat['mean_ms'], reverse=True)
+    return stats, profiles
+
+
+def format_histogram(histogram):
+    """One-line text histogram, e.g. '<=5ms:3 <=10ms:12 >10000ms:1'"""
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+    return " ".join(f"{label}:{count}" for label, count in zip(labels, histogram) if count)
@@ -0,0 +1,223 @@
+"""Monthly archive of old time logs for the journal store
+
+Logs from before the current month are moved out of the snapshot into one
+gzip JSONL file per month under archive/, so startup only reads this
+month's logs plus manifest.json, which holds each month's log count and
+per-day totals. A month's logs are only read when a date range query
+reaches into it, and the last few months read stay cached.
+
+Archiving always takes the oldest rows of the snapshot (in the order they
+were appended), so the archive followed by the snapshot is the whole
+history in append order. A log that arrives late for a month that is
+already archived is added to that month's file as another gzip member.
+The manifest records how many bytes of each file are valid and which
+append-order positions each month holds, so an archiving step that was
+cut short by a crash is simply ignored.
+"""
+import gzip
+import json
+import os
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from log_columns import LogColumns
+from rollups import Rollups
+
+ARCHIVE_DIR = "archive"
+MANIFEST_FILE = "manifest.json"
+ROLLUPS_FILE = "rollups.json"
+MANIFEST_FORMAT = 1
+# Archived months kept in memory after a query read them
+CACHED_MONTHS = 6
+
+
+def month_key(date_text):
+    """'YYYY-MM' of a 'YYYY-MM-DD' date"""
+    return date_text[:7]
+
+
+class MonthlyArchive:
+    """The archive/ directory of a journal store: per-month log files plus their manifest"""
+
+    def __init__(self, data_dir, read_only=False):
+        self.archive_dir = os.path.join(data_dir, ARCHIVE_DIR)
+        self.read_only = read_only
+        self.manifest_file = os.path.join(self.archive_dir, MANIFEST_FILE)
+        self.rollups_file = os.path.join(self.archive_dir, ROLLUPS_FILE)
+        # 'YYYY-MM' -> manifest entry; replaced as a whole on every change, so it can be read without locking
+        self.months = {}
+        # Number of archived logs, which are the first `count` logs in append order
+        self.count = 0
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (month, valid bytes) -> (LogColumns, sorted timestamps, order)
+
+    def load(self):
+        """Read the manifest, returning a list of error messages"""
+        if not os.path.exists(self.manifest_file):
+            return []
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            self.months, self.count = manifest['months'], manifest['count']
+        except Exception as e:
+            return [f"Failed to read {ARCHIVE_DIR}/{MANIFEST_FILE}: {e}"]
+        return []
+
+    def months_between(self, months, start_date, end_date):
+        """The archived months (of a months dict) overlapping a date range, in order"""
+        first, last = start_date.isoformat()[:7], end_date.isoformat()[:7]
+        return sorted(month for month in months if first <= month <= last)
+
+    def count_range(self, months, start_date, end_date):
+        """Number of archived logs from start_date through end_date (inclusive), from the manifest"""
+        start, end = start_date.isoformat(), end_date.isoformat()
+        return sum(count
+                   for month in self.months_between(months, start_date, end_date)
+                   for day, (count, _) in months[month]['days'].items() if start <= day <= end)
+
+    def read_range(self, month, entry, start_ts, end_ts):
+        """The logs of an archived month with start_ts <= Timestamp < end_ts, in time order"""
+        logs, timestamps, order = self._month(month, entry)
+        low = bisect_left(timestamps, start_ts)
+        return logs.take(order[low:bisect_left(timestamps, end_ts, low)])
+
+    def records_since(self, position, limit):
+        """Up to limit archived log dicts from append-order position on"""
+        end = min(position + limit, self.count)
+        months = self.months
+        runs = []
+        for month, entry in months.items():
+            offset = 0
+            for start, count in entry['runs']:
+                runs.append((start, count, month, offset))
+                offset += count
+        records = []
+        for start, count, month, offset in sorted(runs):
+            low, high = max(position, start), min(end, start + count)
+            if low < high:
+                logs = self._month(month, months[month])[0]
+                records.extend(logs.iter_records(offset + low - start, offset + high - start))
+        return records
+
+    def add(self, logs):
+        """Archive a LogColumns of the logs that follow the archived ones in append order"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        dates = logs.columns['Date']
+        durations = logs.columns['Duration (seconds)']
+        rows_by_month = {}
+        for index, code in enumerate(dates.codes):
+            rows_by_month.setdefault(month_key(dates.categories[code]), []).append(index)
+
+        months = dict(self.months)
+        for month, rows in sorted(rows_by_month.items()):
+            entry = months.get(month) or {'file': f"time_logs_{month}.jsonl.gz", 'bytes': 0, 'count': 0,
+                                          'seconds': 0, 'runs': [], 'days': {}}
+            path = os.path.join(self.archive_dir, entry['file'])
+            payload = "".join(json.dumps(log) + "\n" for log in logs.take(rows)).encode('utf-8')
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                # Drop whatever an interrupted earlier attempt left past the valid bytes
+                f.truncate(entry['bytes'])
+                f.seek(entry['bytes'])
+                f.write(gzip.compress(payload))
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+
+            runs = [list(run) for run in entry['runs']]
+            days = {day: list(totals) for day, totals in entry['days'].items()}
+            for index in rows:
+                position = self.count + index
+                if runs and runs[-1][0] + runs[-1][1] == position:
+                    runs[-1][1] += 1
+                else:
+                    runs.append([position, 1])
+                totals = days.setdefault(dates[index], [0, 0])
+                totals[0] += 1
+                totals[1] += durations[index]
+            months[month] = {
+                'file': entry['file'],
+                'bytes': size,
+                'count': entry['count'] + len(rows),
+                'seconds': entry['seconds'] + sum(durations[index] for index in rows),
+                'runs': runs,
+                'days': days,
+            }
+
+        count = self.count + len(logs)
+        rollups = self._read_rollups()
+        if rollups is not None:
+            rollups.add_columns(logs)
+            self._write_json(self.rollups_file, dump_rollups(rollups, count))
+        self._write_json(self.manifest_file, {'format': MANIFEST_FORMAT, 'count': count, 'months': months})
+        self.months, self.count = months, count
+
+    def rollups(self):
+        """Rollups of the archived logs, rebuilt from the month files if the saved ones are out of date"""
+        rollups = self._read_rollups()
+        if rollups is None:
+            rollups = Rollups()
+            months = self.months
+            for month in sorted(months):
+                rollups.add_columns(self._month(month, months[month])[0])
+            if not self.read_only and self.count:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                self._write_json(self.rollups_file, dump_rollups(rollups, self.count))
+        return rollups
+
+    def _read_rollups(self):
+        """The saved rollups if they cover exactly the archived logs, else None"""
+        if not self.count:
+            return Rollups()
+        try:
+            with open(self.rollups_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('count') != self.count:
+            return None
+        rollups = Rollups()
+        for name, rows in saved['tables'].items():
+            rollups.add_totals(name, rows)
+        rollups.deal_names.update(saved['deal_names'])
+        return rollups
+
+    def _month(self, month, entry):
+        """(logs, sorted timestamps, row order) of an archived month, read at most once while cached"""
+        key = (month, entry['bytes'])
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        with open(os.path.join(self.archive_dir, entry['file']), 'rb') as f:
+            data = f.read(entry['bytes'])
+        # Each gzip member carries a CRC, so a damaged file fails here rather than loading bad logs
+        logs = LogColumns.from_records(json.loads(line) for line in gzip.decompress(data).splitlines() if line)
+        timestamps = logs.columns['Timestamp']
+        order = sorted(range(len(logs)), key=timestamps.__getitem__)
+        result = (logs, [timestamps[i] for i in order], order)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > CACHED_MONTHS:
+                self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+
+
+def dump_rollups(rollups, count):
+    """JSON-ready form of a Rollups covering the first `count` archived logs"""
+    return {
+        'count': count,
+        'tables': {name: [[day, *key, seconds] for day, totals in table.items() for key, seconds in totals.items()]
+                   for name, table in rollups.tables.items()},
+        'deal_names': rollups.deal_names,
+    }
@@ -0,0 +1,184 @@
+from array import array
+from datetime import datetime, time
+
+from time_utils import parse_date
+
+# Field order of a time log entry, matching the order logs are exported in
+FIELDS = [
+    'Date',
+    'Timestamp',
+    'Record Id',
+    'Deal Name',
+    'Company Name',
+    'Deal Owner',
+    'Role',
+    'Activity',
+    'Comment',
+    'Start Time',
+    'End Time',
+    'Duration (seconds)',
+    'Segments',
+]
+
+# Fields with few distinct values, stored dictionary-encoded
+CATEGORICAL_FIELDS = {
+    'Date',
+    'Record Id',
+    'Deal Name',
+    'Company Name',
+    'Deal Owner',
+    'Role',
+    'Activity',
+    'Start Time',
+    'End Time',
+}
+
+
+class CategoricalColumn:
+    """Dictionary-encoded string column: one int code per row plus a list of distinct values"""
+
+    __slots__ = ('codes', 'categories', '_lookup')
+
+    def __init__(self, codes=None, categories=None):
+        self.codes = codes if codes is not None else array('i')
+        self.categories = categories if categories is not None else []
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+
+    def append(self, value):
+        # -1 is the missing value marker, as in pandas categoricals
+        self.codes.append(-1 if value is None else self._code(value))
+
+    def extend(self, other):
+        """Append every row of another CategoricalColumn, mapping its codes onto ours"""
+        mapping = [self._code(value) for value in other.categories]
+        self.codes.extend(array('i', (mapping[code] if code >= 0 else -1 for code in other.codes)))
+
+    def _code(self, value):
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._lookup[value] = code
+        return code
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+        return None if code < 0 else self.categories[code]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def take(self, indices):
+        return CategoricalColumn(array('i', (self.codes[i] for i in indices)), list(self.categories))
+
+
+class LogColumns:
+    """Column-oriented container for time log entries
+
+    Timestamps and durations are kept in typed arrays and the repeated
+    string fields are dictionary-encoded, which takes a fraction of the
+    memory of one dict per entry. Rows can still be read back as dicts.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        for field in FIELDS:
+            if field in CATEGORICAL_FIELDS:
+                self.columns[field] = CategoricalColumn()
+            elif field == 'Timestamp':
+                self.columns[field] = array('d')
+            elif field == 'Duration (seconds)':
+                self.columns[field] = array('q')
+            else:
+                self.columns[field] = []
+        self._length = 0
+
+    @classmethod
+    def from_records(cls, logs):
+        """Build a container from an iterable of log dicts"""
+        columns = cls()
+        columns.extend(logs)
+        return columns
+
+    @classmethod
+    def concat(cls, parts):
+        """One container holding the rows of several, in order"""
+        result = cls()
+        for part in parts:
+            for field, column in part.columns.items():
+                result.columns[field].extend(column)
+            result._length += len(part)
+        return result
+
+    def append(self, log):
+        """Append a single log dict"""
+        for field, column in self.columns.items():
+            value = log.get(field)
+            if field == 'Timestamp':
+                if value is None:
+                    # Very old logs have no timestamp, fall back to the start of their day
+                    date = log.get('Date')
+                    value = datetime.combine(parse_date(date), time()).timestamp() if date else float('nan')
+                column.append(value)
+            elif field == 'Duration (seconds)':
+                column.append(value or 0)
+            else:
+                column.append(value)
+        self._length += 1
+
+    def extend(self, logs):
+        for log in logs:
+            self.append(log)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        """Materialize a single row as a log dict"""
+        return {field: column[index] for field, column in self.columns.items()}
+
+    def __iter__(self):
+        return self.iter_records()
+
+    def iter_records(self, start=0, stop=None):
+        """Yield rows as log dicts"""
+        stop = self._length if stop is None else stop
+        for index in range(start, stop):
+            yield self[index]
+
+    def take(self, indices):
+        """New container holding only the given rows, in the given order"""
+        indices = list(indices)
+        taken = LogColumns()
+        for field, column in self.columns.items():
+            if isinstance(column, CategoricalColumn):
+                taken.columns[field] = column.take(indices)
+            elif isinstance(column, array):
+                taken.columns[field] = array(column.typecode, (column[i] for i in indices))
+            else:
+                taken.columns[field] = [column[i] for i in indices]
+        taken._length = len(indices)
+        return taken
+
+    def to_frame(self):
+        """Convert to a pandas DataFrame with categorical dtypes for the string fields
+
+        The numeric columns and category codes are handed to numpy without
+        copying, so the container must not be appended to while the frame
+        is alive. Use it on the containers returned by take() or a store's
+        range() query.
+        """
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for field, column in self.columns.items():
+            if isinstance(column, CategoricalColumn):
+                codes = np.frombuffer(column.codes, dtype=np.intc)
+                data[field] = pd.Categorical.from_codes(codes, categories=column.categories)
+            elif isinstance(column, array):
+                dtype = np.float64 if column.typecode == 'd' else np.int64
+                data[field] = np.frombuffer(column, dtype=dtype)
+            else:
+                data[field] = column
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,705 @@
+import hashlib
+import json
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from pathlib import Path
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+
+from instrumentation import timed
+from log_archive import MonthlyArchive, month_key
+from log_columns import LogColumns
+from rollups import ROLLUP_KEYS, Rollups
+
+# Environment variable used to pick the storage engine ("journal" or "sqlite")
+STORAGE_ENV_VAR = "TIMETRACKER_STORAGE"
+
+# Rows per chunk when streaming a date range, e.g. for exports
+RANGE_CHUNK_SIZE = 10000
+
+
+def open_log_store(data_dir, engine=None, read_only=False):
+    """Create the time log store for data_dir using the configured engine
+
+    Every store exposes the same small interface: load(), append(log),
+    count(), since(position, limit), range(start_date, end_date),
+    count_range(start_date, end_date), iter_range(start_date, end_date,
+    chunk_size), rollups(), close() and load_errors.
+    A read_only store never writes to data_dir, which is what reporting
+    over other users' log directories needs.
+    """
+    engine = engine or os.environ.get(STORAGE_ENV_VAR, "journal")
+    if engine == "sqlite":
+        return SQLiteLogStore(data_dir, read_only=read_only)
+    if engine == "journal":
+        return JournalLogStore(data_dir, read_only=read_only)
+    raise ValueError(f"Unknown storage engine: {engine}")
+
+
+class JournalLogStore:
+    """Time log storage backed by a JSON snapshot plus an append-only journal
+
+    Each new log is appended as one JSON line to the journal, so saving no
+    longer rewrites the whole history. A background thread batches fsyncs
+    and periodically compacts the journal into the snapshot.
+
+    Every journal record carries a CRC of its log and every snapshot a
+    SHA-256 of its contents, both verified on load. The snapshot is written
+    to a temp file, fsynced and renamed over the old one, which is kept as
+    the newest of `backups` rotating copies (time_logs_data.json.bak.1 is
+    the most recent) to fall back to if the snapshot fails its checksum.
+
+    Compaction also moves logs from before the current month into the
+    monthly archive (see log_archive), so only this month's logs are kept
+    in memory and read at startup; older months are read when a date
+    range query needs them.
+    """
+
+    SNAPSHOT_FORMAT = 3
+    # Written last in a snapshot, followed by the SHA-256 of everything before it
+    CHECKSUM_MARKER = b', "sha256": "'
+
+    def __init__(self, data_dir, fsync_interval=1.0, compact_threshold=500, read_only=False, backups=3):
+        self.read_only = read_only
+        self.data_dir = data_dir
+        self.snapshot_file = os.path.join(data_dir, "time_logs_data.json")
+        self.journal_file = os.path.join(data_dir, "time_logs_journal.jsonl")
+        # The journal is renamed to this while a compaction is in progress
+        self.compacting_file = self.journal_file + ".compacting"
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        self.backups = backups
+
+        self.archive = MonthlyArchive(data_dir, read_only=read_only)
+        self.logs = LogColumns()  # The logs that aren't archived
+        self.seq = 0  # Sequence number of the last record in self.logs
+        self.load_errors = []
+        self._raw_snapshot = None
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._journal = None
+        self._journal_records = 0
+        self._dirty = False
+        self._worker = None
+        # (sorted timestamps, row indices), only needed if rows aren't in time order
+        self._time_order = None
+        # Built by the first rollups() call, then kept up to date by append()
+        self._rollups = None
+
+    @timed("logs.load")
+    def load(self):
+        """Load the archive manifest and snapshot, replay the journal and open it for appending"""
+        self.load_errors.extend(self.archive.load())
+        snapshot_seq = self._read_snapshot()
+        self.seq = snapshot_seq
+
+        # Restored from a backup: write a fresh snapshot rather than keep relying on it
+        needs_compaction = self._restored_from_backup
+        for path in (self.compacting_file, self.journal_file):
+            if not os.path.exists(path):
+                continue
+            if path == self.compacting_file:
+                # A previous compaction didn't finish, fold it in now
+                needs_compaction = True
+            self._journal_records += self._replay(path)
+
+        if not isinstance(self._raw_snapshot, dict):
+            # Legacy list-only file (or no file yet): migrate to the new format
+            needs_compaction = needs_compaction or len(self.logs) > 0
+        self._raw_snapshot = None
+        self._check_time_order()
+        if self.read_only:
+            return self.logs
+        # Logs from before this month still in the snapshot, e.g. after upgrading or a new month
+        needs_compaction = needs_compaction or self._archivable_rows(self.logs, len(self.logs)) > 0
+
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        if self._journal.tell() > 0 and not self._ends_with_newline(self.journal_file):
+            # Terminate a torn last line so the next record starts cleanly
+            self._journal.write("\n")
+        if needs_compaction:
+            self._compact()
+
+        self._worker = threading.Thread(target=self._run, name="log-store", daemon=True)
+        self._worker.start()
+        return self.logs
+
+    @timed("logs.save")
+    def append(self, log):
+        """Append a single log entry to the journal"""
+        with self._lock:
+            self.seq += 1
+            log_json = json.dumps(log)
+            self._journal.write(f'{{"seq": {self.seq}, "crc": {zlib.crc32(log_json.encode())}, "log": {log_json}}}\n')
+            # Flush to the OS right away; the fsync is batched by the worker
+            self._journal.flush()
+            self.logs.append(log)
+            self._track_time_order(len(self.logs) - 1)
+            if self._rollups is not None:
+                self._rollups.add(log)
+            self._journal_records += 1
+            self._dirty = True
+        self._wake.set()
+
+    def count(self):
+        """Number of stored logs, archived ones included"""
+        with self._lock:
+            return len(self.logs) + self.archive.count
+
+    def since(self, position, limit):
+        """Up to limit log dicts appended after the first `position` logs, in append order"""
+        with self._lock:
+            archived = self.archive.count
+            start, stop = max(0, position - archived), min(len(self.logs), position + limit - archived)
+            live = list(self.logs.iter_records(start, stop)) if start < stop else []
+        if position >= archived:
+            return live
+        return self.archive.records_since(position, min(limit, archived - position)) + live
+
+    def rollups(self):
+        """Precomputed duration totals (see rollups.Rollups), built on first use"""
+        with self._lock:
+            if self._rollups is None:
+                self._rollups = self.archive.rollups()
+                self._rollups.add_columns(self.logs)
+            return self._rollups
+
+    def range(self, start_date, end_date):
+        """Logs from start_date through end_date (inclusive), in time order
+
+        Rows are appended in time order, so this is a binary search over the
+        Timestamp column rather than a scan of every log. Archived months in
+        the range are read from the archive.
+        """
+        parts = list(self._range_parts(start_date, end_date, None))
+        return parts[0] if len(parts) == 1 else LogColumns.concat(parts)
+
+    def count_range(self, start_date, end_date):
+        """Number of logs from start_date through end_date (inclusive)"""
+        with self._lock:
+            live = len(self._range_rows(start_date, end_date))
+            months = self.archive.months
+        # Archived logs are counted from the manifest's per-day totals, without reading them
+        return live + self.archive.count_range(months, start_date, end_date)
+
+    def iter_range(self, start_date, end_date, chunk_size=RANGE_CHUNK_SIZE):
+        """Yield the logs of range() as LogColumns of at most chunk_size rows"""
+        return self._range_parts(start_date, end_date, chunk_size)
+
+    def _range_parts(self, start_date, end_date, chunk_size):
+        """Yield the logs of a date range in time order, in LogColumns of at most chunk_size rows (None: any)
+
+        Archived months are read one at a time and merged with any live
+        rows that arrived late for them.
+        """
+        # Appends may come from a background thread, don't read a half-appended row
+        with self._lock:
+            logs = self.logs
+            rows = self._range_rows(start_date, end_date)
+            months = self.archive.months
+        start_ts = datetime.combine(start_date, datetime.min.time()).timestamp()
+        end_ts = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).timestamp()
+
+        timestamps = logs.columns['Timestamp']
+        position = 0
+        for month in self.archive.months_between(months, start_date, end_date):
+            year, number = int(month[:4]), int(month[5:])
+            month_end_ts = min(end_ts, datetime(year + number // 12, number % 12 + 1, 1).timestamp())
+            part = self.archive.read_range(month, months[month], start_ts, month_end_ts)
+            split = position
+            while split < len(rows) and timestamps[rows[split]] < month_end_ts:
+                split += 1
+            if split > position:
+                with self._lock:
+                    late = logs.take(rows[position:split])
+                part = LogColumns.concat([part, late])
+                part_timestamps = part.columns['Timestamp']
+                part = part.take(sorted(range(len(part)), key=part_timestamps.__getitem__))
+                position = split
+            if chunk_size is None or len(part) <= chunk_size:
+                if part:
+                    yield part
+            else:
+                for start in range(0, len(part), chunk_size):
+                    yield part.take(range(start, min(start + chunk_size, len(part))))
+
+        rows = rows[position:]
+        if chunk_size is None:
+            with self._lock:
+                rest = logs.take(rows)
+            yield rest
+            return
+        for start in range(0, len(rows), chunk_size):
+            with self._lock:
+                chunk = logs.take(rows[start:start + chunk_size])
+            yield chunk
+
+    def _range_rows(self, start_date, end_date):
+        """Row indices of the logs in a date range, in time order (call with the lock held)"""
+        start_ts = datetime.combine(start_date, datetime.min.time()).timestamp()
+        end_ts = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).timestamp()
+        if self._time_order is None:
+            timestamps = self.logs.columns['Timestamp']
+            low = bisect_left(timestamps, start_ts)
+            return range(low, bisect_left(timestamps, end_ts, low))
+
+        sorted_timestamps, order = self._time_order
+        low = bisect_left(sorted_timestamps, start_ts)
+        return order[low:bisect_left(sorted_timestamps, end_ts, low)]
+
+    def _check_time_order(self):
+        """Switch range() to a sorted copy of the timestamps if the rows aren't in time order"""
+        self._time_order = None
+        timestamps = self.logs.columns['Timestamp']
+        if any(timestamps[i] > timestamps[i + 1] for i in range(len(timestamps) - 1)):
+            self._build_time_order()
+
+    def _build_time_order(self):
+        timestamps = self.logs.columns['Timestamp']
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        self._time_order = ([timestamps[i] for i in order], order)
+
+    def _track_time_order(self, index):
+        """Keep range()'s binary search valid after appending row `index`"""
+        timestamps = self.logs.columns['Timestamp']
+        if self._time_order is None:
+            if index and timestamps[index] < timestamps[index - 1]:
+                # The clock went backwards, search a sorted copy of the timestamps from now on
+                self._build_time_order()
+            return
+        sorted_timestamps, order = self._time_order
+        position = bisect_right(sorted_timestamps, timestamps[index])
+        sorted_timestamps.insert(position, timestamps[index])
+        order.insert(position, index)
+
+    def close(self):
+        """Stop the background worker and sync everything to disk"""
+        if self._journal is None:
+            return
+        self._closed.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+        with self._lock:
+            self._sync()
+            self._journal.close()
+            self._journal = None
+
+    def _read_snapshot(self):
+        """Read the newest snapshot that passes its checksum, returning the sequence number it covers"""
+        self._raw_snapshot = None
+        self._restored_from_backup = False
+        for path in [self.snapshot_file] + self._backup_files():
+            if not os.path.exists(path):
+                continue
+            try:
+                self._raw_snapshot = self._read_verified(path)
+            except Exception as e:
+                self.load_errors.append(f"Failed to read {os.path.basename(path)}: {e}")
+                if path == self.snapshot_file and not self.read_only:
+                    # Keep the unreadable file around instead of overwriting it later
+                    os.replace(path, f"{path}.corrupt-{int(time.time())}")
+                continue
+            if path != self.snapshot_file:
+                self._restored_from_backup = True
+                if self.load_errors:
+                    self.load_errors.append(f"Restored time logs from {os.path.basename(path)}; "
+                                            f"logs saved after it was made may be missing")
+            break
+        else:
+            return 0
+
+        if isinstance(self._raw_snapshot, list):
+            # Legacy format: a plain list of logs without sequence numbers
+            logs, seq, archived = self._raw_snapshot, 0, 0
+        else:
+            logs = self._raw_snapshot.get('logs', [])
+            seq, archived = self._raw_snapshot.get('seq', 0), self._raw_snapshot.get('archived', 0)
+        if archived < self.archive.count:
+            # Archiving finished but the snapshot without those (oldest) logs wasn't written yet
+            logs = logs[self.archive.count - archived:]
+        elif archived > self.archive.count:
+            self.load_errors.append(f"{archived - self.archive.count} archived time logs are missing")
+        self.logs = LogColumns.from_records(logs)
+        if isinstance(self._raw_snapshot, list):
+            return 0
+        # Only the format matters from here on, let the parsed logs be freed
+        self._raw_snapshot = {'format': self._raw_snapshot.get('format')}
+        return seq
+
+    def _read_verified(self, path):
+        """Parse a snapshot file, raising ValueError if it doesn't match its checksum"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        raw = json.loads(data)
+        if isinstance(raw, list) or raw.get('format', 0) < 3:
+            # Written before snapshots had checksums
+            return raw
+        marker = data.rfind(self.CHECKSUM_MARKER)
+        if marker < 0 or hashlib.sha256(data[:marker]).hexdigest() != raw.get('sha256'):
+            raise ValueError("checksum mismatch")
+        return raw
+
+    def _backup_files(self):
+        """Snapshot backup paths, most recent first"""
+        return [f"{self.snapshot_file}.bak.{index}" for index in range(1, self.backups + 1)]
+
+    def _replay(self, path):
+        """Replay journal records newer than what is already loaded"""
+        replayed = 0
+        corrupt = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash, the record never completed
+                    continue
+                if record['seq'] <= self.seq:
+                    continue
+                # Records written before journal CRCs have none to check
+                if 'crc' in record and zlib.crc32(json.dumps(record['log']).encode()) != record['crc']:
+                    corrupt += 1
+                    continue
+                self.logs.append(record['log'])
+                self.seq = record['seq']
+                replayed += 1
+        if corrupt:
+            self.load_errors.append(f"Skipped {corrupt} corrupt record(s) in {os.path.basename(path)}")
+        return replayed
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _run(self):
+        """Background worker: batch fsyncs and compact the journal when it grows"""
+        while not self._closed.is_set():
+            self._wake.wait()
+            # Give further appends a chance to land so they share one fsync
+            self._closed.wait(self.fsync_interval)
+            self._wake.clear()
+            with self._lock:
+                self._sync()
+                should_compact = self._journal_records >= self.compact_threshold
+            if should_compact and not self._closed.is_set():
+                self._compact()
+
+    def _sync(self):
+        """fsync the journal if there are unsynced appends (lock must be held)"""
+        if self._dirty and self._journal is not None:
+            os.fsync(self._journal.fileno())
+            self._dirty = False
+
+    def _compact(self):
+        """Write the current logs into the snapshot and drop the old journal"""
+        with self._lock:
+            self._sync()
+            # Rotate the journal so appends can continue while the snapshot is written
+            self._journal.close()
+            if os.path.exists(self.compacting_file):
+                # Leftover from an interrupted compaction, keep its records too
+                with open(self.compacting_file, 'a', encoding='utf-8') as dst, \
+                        open(self.journal_file, 'r', encoding='utf-8') as src:
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.journal_file)
+            else:
+                os.replace(self.journal_file, self.compacting_file)
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+            # Rows are only ever appended, so the first `count` rows stay stable
+            logs = self.logs
+            count = len(logs)
+            seq = self.seq
+            self._journal_records = 0
+
+            archived = self._archivable_rows(logs, count)
+            archive_count = self.archive.count
+
+        # The snapshot is written before the archive manifest moves on, so the archive never holds logs
+        # that the snapshot and journal don't; until the snapshot below drops them, load() skips them
+        self._write_snapshot(logs.iter_records(0, count), seq, archive_count)
+        if archived:
+            with self._lock:
+                # Move last month's (or older) logs into the archive and out of memory
+                self.archive.add(logs.take(range(archived)))
+                self.logs = self.logs.take(range(archived, len(self.logs)))
+                self._check_time_order()
+            self._write_snapshot(logs.iter_records(archived, count), seq, self.archive.count)
+        os.remove(self.compacting_file)
+
+    def _archivable_rows(self, logs, count):
+        """Number of leading rows (of the first count) dated before the current month"""
+        dates = logs.columns['Date']
+        current_month = datetime.now().strftime('%Y-%m')
+        old = [month_key(date) < current_month for date in dates.categories]
+        for index in range(count):
+            code = dates.codes[index]
+            if code < 0 or not old[code]:
+                return index
+        return count
+
+    def _write_snapshot(self, logs, seq, archived):
+        """Atomically replace the snapshot file, streaming the logs out one by one"""
+        tmp_file = self.snapshot_file + ".tmp"
+        digest = hashlib.sha256()
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            def write(text):
+                f.write(text)
+                digest.update(text.encode())
+
+            write(f'{{"format": {self.SNAPSHOT_FORMAT}, "seq": {seq}, "archived": {archived}, "logs": [')
+            for index, log in enumerate(logs):
+                if index:
+                    write(", ")
+                write(json.dumps(log))
+            write("]")
+            f.write(f'{self.CHECKSUM_MARKER.decode()}{digest.hexdigest()}"}}')
+            f.flush()
+            os.fsync(f.fileno())
+        self._rotate_backups()
+        os.replace(tmp_file, self.snapshot_file)
+        self._fsync_dir()
+
+    def _rotate_backups(self):
+        """Shift the snapshot backups along by one and make the current snapshot the newest"""
+        backups = self._backup_files()
+        if not backups:
+            return
+        for newer, older in reversed(list(zip(backups, backups[1:]))):
+            if os.path.exists(newer):
+                os.replace(newer, older)
+        if os.path.exists(self.snapshot_file):
+            # Until the new snapshot is renamed in, load() falls back to this one
+            os.replace(self.snapshot_file, backups[0])
+
+    def _fsync_dir(self):
+        """Make the renames in the data directory durable, where the OS supports it"""
+        try:
+            fd = os.open(self.data_dir, os.O_RDONLY)
+        except OSError:
+            return  # Windows can't open directories
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+class SQLiteLogStore:
+    """Time log storage in a SQLite database
+
+    Logs stay on disk and are queried on demand, with indexes on the date,
+    timestamp, Record Id and Activity columns so date range queries are
+    index seeks. Existing JSON logs are imported the first time it is used.
+    """
+
+    # Log field name -> database column, in the order logs are exported
+    COLUMNS = [
+        ('Date', 'date'),
+        ('Timestamp', 'timestamp'),
+        ('Record Id', 'record_id'),
+        ('Deal Name', 'deal_name'),
+        ('Company Name', 'company_name'),
+        ('Deal Owner', 'deal_owner'),
+        ('Role', 'role'),
+        ('Activity', 'activity'),
+        ('Comment', 'comment'),
+        ('Start Time', 'start_time'),
+        ('End Time', 'end_time'),
+        ('Duration (seconds)', 'duration_seconds'),
+        ('Segments', 'segments'),
+    ]
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS time_logs (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            timestamp REAL,
+            record_id TEXT,
+            deal_name TEXT,
+            company_name TEXT,
+            deal_owner TEXT,
+            role TEXT,
+            activity TEXT,
+            comment TEXT,
+            start_time TEXT,
+            end_time TEXT,
+            duration_seconds INTEGER NOT NULL DEFAULT 0,
+            segments TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_time_logs_date ON time_logs (date, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_time_logs_timestamp ON time_logs (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_time_logs_record_id ON time_logs (record_id);
+        CREATE INDEX IF NOT EXISTS idx_time_logs_activity ON time_logs (activity);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, data_dir, read_only=False):
+        self.data_dir = data_dir
+        self.read_only = read_only
+        self.db_file = os.path.join(data_dir, "time_logs.sqlite3")
+        self.load_errors = []
+        self.conn = None
+        # The connection is shared between the Tk thread and background jobs
+        self._lock = threading.Lock()
+        # Built by the first rollups() call, then kept up to date by append()
+        self._rollups = None
+        self._fields = [field for field, _ in self.COLUMNS]
+        self._select = "SELECT " + ", ".join(column for _, column in self.COLUMNS) + " FROM time_logs"
+        self._insert = (
+            "INSERT INTO time_logs (" + ", ".join(column for _, column in self.COLUMNS) + ") "
+            "VALUES (" + ", ".join("?" * len(self.COLUMNS)) + ")"
+        )
+
+    @timed("logs.load")
+    def load(self):
+        """Open the database, creating the schema and importing JSON logs if needed"""
+        if self.read_only:
+            if not os.path.exists(self.db_file):
+                raise FileNotFoundError(f"No time log database in {self.data_dir}")
+            self.conn = sqlite3.connect(Path(self.db_file).resolve().as_uri() + "?mode=ro", uri=True,
+                                        check_same_thread=False)
+            return
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(time_logs)")}
+        if 'segments' not in columns:
+            # Databases created before pause segments were recorded
+            self.conn.execute("ALTER TABLE time_logs ADD COLUMN segments TEXT")
+        if self._get_meta('json_imported') is None:
+            self._import_json_logs()
+
+    @timed("logs.save")
+    def append(self, log):
+        """Insert a single log entry"""
+        with self._lock, self.conn:
+            self.conn.execute(self._insert, self._to_row(log))
+            if self._rollups is not None:
+                self._rollups.add(log)
+
+    def count(self):
+        """Number of stored logs"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM time_logs").fetchone()[0]
+
+    def since(self, position, limit):
+        """Up to limit log dicts appended after the first `position` logs, in append order"""
+        with self._lock:
+            rows = self.conn.execute(self._select + " ORDER BY id LIMIT ? OFFSET ?", (limit, position)).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def rollups(self):
+        """Precomputed duration totals (see rollups.Rollups), built on first use
+
+        Building them is one GROUP BY per rollup table; after that append()
+        keeps them current without querying the database again.
+        """
+        with self._lock:
+            if self._rollups is None:
+                column_names = dict(self.COLUMNS)
+                rollups = Rollups()
+                for name, fields in ROLLUP_KEYS.items():
+                    key = ", ".join(["date"] + [column_names[field] for field in fields])
+                    rollups.add_totals(name, self.conn.execute(
+                        f"SELECT {key}, SUM(duration_seconds) FROM time_logs GROUP BY {key}"))
+                # Deal name of the latest log of every Record Id
+                rollups.deal_names.update(self.conn.execute(
+                    "SELECT record_id, deal_name FROM time_logs WHERE id IN "
+                    "(SELECT MAX(id) FROM time_logs WHERE record_id IS NOT NULL GROUP BY record_id)"))
+                self._rollups = rollups
+            return self._rollups
+
+    def range(self, start_date, end_date):
+        """Logs from start_date through end_date (inclusive), in time order"""
+        with self._lock:
+            rows = self.conn.execute(
+                self._select + " WHERE date BETWEEN ? AND ? ORDER BY date, timestamp",
+                (start_date.isoformat(), end_date.isoformat()),
+            ).fetchall()
+        return LogColumns.from_records(self._from_row(row) for row in rows)
+
+    def count_range(self, start_date, end_date):
+        """Number of logs from start_date through end_date (inclusive)"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM time_logs WHERE date BETWEEN ? AND ?",
+                (start_date.isoformat(), end_date.isoformat()),
+            ).fetchone()[0]
+
+    def iter_range(self, start_date, end_date, chunk_size=RANGE_CHUNK_SIZE):
+        """Yield the logs of range() as LogColumns of at most chunk_size rows
+
+        Rows are fetched from the cursor chunk by chunk, so only one chunk
+        is in memory at a time.
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                self._select + " WHERE date BETWEEN ? AND ? ORDER BY date, timestamp",
+                (start_date.isoformat(), end_date.isoformat()),
+            )
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield LogColumns.from_records(self._from_row(row) for row in rows)
+        finally:
+            cursor.close()
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _to_row(self, log):
+        row = [log.get(field) for field in self._fields]
+        if row[-1] is not None:
+            # Segments are a list of [start, seconds] pairs, stored as JSON
+            row[-1] = json.dumps(row[-1])
+        return row
+
+    def _from_row(self, row):
+        log = dict(zip(self._fields, row))
+        if log['Segments'] is not None:
+            log['Segments'] = json.loads(log['Segments'])
+        return log
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _import_json_logs(self):
+        """One-time import of logs kept by the journal store"""
+        journal_store = JournalLogStore(self.data_dir)
+        try:
+            journal_store.load()
+            self.load_errors.extend(journal_store.load_errors)
+            imported = 0
+            with self.conn:
+                # Archived months included, a chunk at a time
+                while True:
+                    logs = journal_store.since(imported, RANGE_CHUNK_SIZE)
+                    if not logs:
+                        break
+                    self.conn.executemany(self._insert, (self._to_row(log) for log in logs))
+                    imported += len(logs)
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", (str(imported),))
+        finally:
+            journal_store.close()
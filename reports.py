@@ -0,0 +1,382 @@
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from log_columns import LogColumns
+from time_utils import format_durations, format_hours_minutes, parse_dates
+
+SUMMARY_FIRST_COLUMN = 'PROJECTS'
+SUMMARY_TOTAL_COLUMN = 'TASK TOTAL\nHRS/WEEK'
+
+# Shown when an export period has no logs
+EMPTY_PERIOD_MESSAGES = {
+    'daily': "No time logs for today!",
+    'weekly': "No time logs for this week!",
+    'quarterly': "No time logs for this quarter!",
+    'range': "No time logs in this date range!",
+}
+
+
+def export_period(period, today=None, start_date=None, end_date=None):
+    """(start_date, end_date, period_str) for a "daily", "weekly", "quarterly" or "range" export"""
+    today = today or datetime.now().date()
+    if period == "daily":
+        return today, today, f"daily_{today.strftime('%Y-%m-%d')}"
+    if period == "weekly":
+        # Monday to Sunday of the current week
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6)
+        return (start_of_week, end_of_week,
+                f"weekly_{start_of_week.strftime('%Y-%m-%d')}_to_{end_of_week.strftime('%Y-%m-%d')}")
+    if period == "quarterly":
+        # First to last day of the current calendar quarter
+        start_of_quarter = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+        next_quarter = (start_of_quarter + timedelta(days=92)).replace(day=1)
+        end_of_quarter = next_quarter - timedelta(days=1)
+        return (start_of_quarter, end_of_quarter,
+                f"{today.year}_Q{(today.month - 1) // 3 + 1}")
+    if period == "range":
+        return start_date, end_date, f"{start_date.strftime('%Y-%m-%d')}_to_{end_date.strftime('%Y-%m-%d')}"
+    raise ValueError(f"Unknown export period: {period}")
+
+
+def export_frame(logs):
+    """DataFrame of the detailed logs as they are exported"""
+    # Create a DataFrame from the logs (categorical string columns)
+    logs_df = logs.to_frame()
+
+    # Add formatted duration (HH:MM:SS)
+    if 'Duration (seconds)' in logs_df.columns:
+        logs_df['Duration (HH:MM:SS)'] = format_durations(logs_df['Duration (seconds)'])
+
+    # For cleaner output, drop the timestamp and pause segments which are only for internal use
+    logs_df = logs_df.drop(columns=[column for column in ('Timestamp', 'Segments') if column in logs_df.columns])
+    return logs_df
+
+
+@timed("export.write")
+def write_export(logs, file_path, format_type, progress=None):
+    """Write detailed logs plus weekly summaries to file_path
+
+    logs is a LogColumns, or an iterable of LogColumns chunks such as a
+    store's iter_range(). Chunks are written as they come and only their
+    per day and activity totals are kept for the summaries, so memory use
+    doesn't grow with the size of the export.
+
+    format_type is "csv" or "excel". CSV exports put the summary in a
+    separate file, whose path is returned; Excel exports add it as sheets
+    and return None. progress, if given, is called with a message before
+    each step.
+    """
+    progress = progress or (lambda message: None)
+    chunks = [logs] if isinstance(logs, LogColumns) else logs
+    totals = WeeklyTotals(comments=True)
+    if format_type == "csv":
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            for index, logs_df in enumerate(export_chunks(chunks, totals, progress)):
+                logs_df.to_csv(f, header=index == 0, index=False)
+        progress("Writing weekly summary...")
+        # Next to the detailed logs whatever their extension, never over them
+        summary_path = os.path.splitext(file_path)[0] + '_weekly_summary.csv'
+        export_weekly_summaries(totals.frame(), summary_path, "csv")
+        return summary_path
+
+    from openpyxl import Workbook
+    from timesheet_excel import set_column_widths
+
+    # Write-only mode streams rows to disk instead of keeping every cell in memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Detailed Logs')
+    for index, logs_df in enumerate(export_chunks(chunks, totals, progress)):
+        if index == 0:
+            set_column_widths(worksheet, logs_df.columns)
+            worksheet.freeze_panes = 'A2'
+            append_header(worksheet, logs_df.columns)
+        # Missing values become empty cells, as with DataFrame.to_excel
+        values = logs_df.astype(object).where(logs_df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            worksheet.append(row)
+    progress("Writing weekly summary...")
+    export_weekly_summaries(totals.frame(), workbook, "excel")
+    workbook.save(file_path)
+    return None
+
+
+def export_chunks(chunks, totals, progress):
+    """Yield the export frame of every chunk, adding it to totals
+
+    Yields at least one (possibly empty) frame, so the header is always
+    written.
+    """
+    rows = 0
+    for logs in chunks:
+        if not rows or len(logs):
+            logs_df = export_frame(logs)
+            totals.add(logs_df)
+            rows += len(logs_df)
+            progress(f"Writing detailed logs... ({rows} rows)")
+            yield logs_df
+    if not rows:
+        yield export_frame(LogColumns())
+
+
+def append_header(worksheet, columns):
+    """Append a header row in the timesheet Header style to a write-only worksheet"""
+    from timesheet_excel import RowTemplate, add_timesheet_styles
+
+    add_timesheet_styles(worksheet.parent)
+    RowTemplate(worksheet, ['Header'] * len(columns)).append(list(columns))
+
+
+def comment_mask(comments):
+    """Boolean array of which values of a Comment column hold some text"""
+    return (comments.notna() & (comments.astype(str).str.strip() != "")).to_numpy()
+
+
+class WeeklyTotals:
+    """Running duration totals per (Date, Activity), all the weekly summaries need
+
+    Its size depends on the number of days and activities rather than the
+    number of logs, so it stays small while an export is streamed. Other
+    summaries can total by more fields through keys. With comments=True the
+    distinct comments per key are kept as well, for the COMMENT rows.
+    """
+
+    def __init__(self, keys=('Date', 'Activity'), comments=False):
+        self.keys = list(keys)
+        self.totals = {}
+        self.comments = {} if comments else None
+
+    def add(self, logs_df):
+        grouped = logs_df.groupby(self.keys, observed=True, dropna=False, sort=False)['Duration (seconds)'].sum()
+        for key, seconds in grouped.items():
+            self.totals[key] = self.totals.get(key, 0) + int(seconds)
+        if self.comments is not None and 'Comment' in logs_df.columns:
+            has_text = comment_mask(logs_df['Comment'])
+            keyed = logs_df.loc[has_text, self.keys].astype(object).itertuples(index=False, name=None)
+            for key, text in zip(keyed, logs_df['Comment'].to_numpy(dtype=object)[has_text]):
+                seen = self.comments.setdefault(key, [])
+                if text.strip() not in seen:
+                    seen.append(text.strip())
+
+    def frame(self):
+        """DataFrame with the key columns plus 'Duration (seconds)' (and 'Comment' if kept)"""
+        frame = pd.DataFrame(
+            [key + (seconds,) for key, seconds in self.totals.items()],
+            columns=self.keys + ['Duration (seconds)'],
+        )
+        if self.comments is not None:
+            frame['Comment'] = ["; ".join(self.comments.get(key, ())) for key in self.totals]
+        return frame
+
+
+def build_analytics(rollups, start_date, end_date):
+    """Effort tables for a date range, read from a store's rollups
+
+    Returns a dict of table name -> DataFrame: hours per deal (in total and
+    per activity), per company and per deal owner, largest first. Hours are
+    summed as seconds and not rounded, so the deal rows add up to the
+    company and owner totals; write_analytics rounds them for display.
+    """
+    deal_totals = pd.DataFrame(
+        [(record_id or "", activity or "", seconds)
+         for (record_id, activity), seconds in rollups.query('deal', start_date, end_date).items()],
+        columns=['Record Id', 'Activity', 'Seconds'],
+    )
+    by_deal = deal_totals.pivot_table(index='Record Id', columns='Activity', values='Seconds',
+                                      aggfunc='sum', fill_value=0)
+    by_deal.columns = list(by_deal.columns)
+    by_deal.insert(0, 'Total Hours', by_deal.sum(axis=1))
+    by_deal = by_deal.sort_values('Total Hours', ascending=False, kind='stable')
+    by_deal = by_deal / 3600
+    by_deal.insert(0, 'Deal Name', [rollups.deal_names.get(record_id) or "" for record_id in by_deal.index])
+    tables = {'Hours by Deal': by_deal.reset_index()}
+
+    for table_name, rollup, column in (('Hours by Company', 'company', 'Company Name'),
+                                       ('Hours by Deal Owner', 'owner', 'Deal Owner')):
+        totals = rollups.query(rollup, start_date, end_date)
+        frame = pd.DataFrame([(key[0] or "", seconds) for key, seconds in totals.items()],
+                             columns=[column, 'Seconds'])
+        frame = frame.groupby(column, as_index=False)['Seconds'].sum()
+        frame['Total Hours'] = frame.pop('Seconds') / 3600
+        tables[table_name] = frame.sort_values('Total Hours', ascending=False, kind='stable', ignore_index=True)
+    return tables
+
+
+@timed("export.analytics")
+def write_analytics(rollups, start_date, end_date, file_path, format_type):
+    """Write the effort tables of build_analytics to a CSV file (one after another) or workbook (one sheet each)"""
+    tables = build_analytics(rollups, start_date, end_date)
+    if format_type == "csv":
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            for index, (table_name, table) in enumerate(tables.items()):
+                if index:
+                    f.write("\n")
+                f.write(f"{table_name}\n")
+                table.to_csv(f, index=False, float_format='%.2f')
+        return
+
+    from openpyxl import Workbook
+    from timesheet_excel import RowTemplate
+
+    workbook = Workbook(write_only=True)
+    for table_name, table in tables.items():
+        worksheet = workbook.create_sheet(table_name)
+        worksheet.column_dimensions['A'].width = 24
+        worksheet.freeze_panes = 'A2'
+        append_header(worksheet, table.columns)
+        # Exact hours, shown with two decimals, so sums over them in Excel match the totals
+        row = RowTemplate(worksheet, ['Decimal Hours' if pd.api.types.is_float_dtype(dtype) else None
+                                      for dtype in table.dtypes])
+        for values in table.itertuples(index=False, name=None):
+            row.append(values)
+    workbook.save(file_path)
+
+
+def export_weekly_summaries(logs_df, output, format_type):
+    """Export one weekly summary per ISO week covered by logs_df"""
+    if logs_df.empty:
+        return
+    weeks = split_iso_weeks(logs_df)
+    if len(weeks) == 1:
+        export_weekly_summary(logs_df, output, format_type)
+        return
+
+    if format_type == "csv":
+        # One CSV holding the weeks one after another, each under its own heading
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            for index, ((iso_year, iso_week), week_df) in enumerate(weeks):
+                if index:
+                    f.write("\n")
+                f.write(f"Week {iso_year}-W{iso_week:02d}\n")
+                export_weekly_summary(week_df, f, "csv")
+    else:  # Excel, one sheet per week
+        for (iso_year, iso_week), week_df in weeks:
+            export_weekly_summary(week_df, output, "excel",
+                                  sheet_name=f"Timesheet {iso_year}-W{iso_week:02d}")
+
+
+def export_weekly_summary(logs_df, output, format_type, sheet_name='Weekly Timesheet'):
+    """Create a weekly summary similar to the timesheet image"""
+    if logs_df.empty:
+        return
+
+    # Export the summary
+    if format_type == "csv":
+        build_weekly_summary(logs_df).to_csv(output, index=False)
+    else:  # Excel, output is a write-only openpyxl workbook
+        from timesheet_excel import write_weekly_timesheet
+
+        # Hours stay numbers and totals are formulas, formatted by the workbook's named styles
+        write_weekly_timesheet(output, sheet_name, weekly_grid(logs_df), SUMMARY_FIRST_COLUMN, SUMMARY_TOTAL_COLUMN)
+
+
+def split_iso_weeks(logs_df):
+    """Split logs into one frame per ISO week, in one pass over the dates
+
+    Returns a list of ((iso_year, iso_week), frame) pairs in week order.
+    """
+    days = parse_dates(logs_df['Date'])
+    # 1970-01-01 was a Thursday, so (days since epoch + 3) % 7 is the weekday with Monday = 0
+    day_numbers = days.astype(np.int64)
+    week_starts = day_numbers - (day_numbers + 3) % 7
+    week_codes, weeks = pd.factorize(week_starts, sort=True)
+    order = np.argsort(week_codes, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(week_codes, minlength=len(weeks)))])
+
+    result = []
+    for code, week_start in enumerate(weeks):
+        iso_year, iso_week, _ = np.datetime64(int(week_start), 'D').item().isocalendar()
+        rows = order[bounds[code]:bounds[code + 1]]
+        result.append(((iso_year, iso_week), logs_df.iloc[rows]))
+    return result
+
+
+# Activity x weekday durations of one week: date_headers (7 'MON D' labels),
+# activities (sorted names), seconds (activities x 7 int array) and
+# comments (activities x 7 lists of '; '-joined comment texts)
+WeekGrid = namedtuple('WeekGrid', ['date_headers', 'activities', 'seconds', 'comments'])
+
+
+def weekly_grid(logs_df):
+    """The WeekGrid of the week of the earliest log
+
+    logs_df needs 'Date', 'Activity' and 'Duration (seconds)' columns, and
+    the comments are taken from 'Comment' if it has one.
+    """
+    days = parse_dates(logs_df['Date'])
+    durations = logs_df['Duration (seconds)'].to_numpy(dtype=np.int64)
+    activity_codes, activity_names = pd.factorize(logs_df['Activity'])
+    activity_names = np.asarray(activity_names, dtype=object)
+
+    # Monday of the week the earliest log falls in
+    min_date = days.min().item()
+    start_of_week = min_date - timedelta(days=min_date.weekday())
+    date_range = [start_of_week + timedelta(days=i) for i in range(7)]
+    date_headers = [f"{d.strftime('%b').upper()} {d.day}" for d in date_range]
+
+    # Only logs within that week are counted
+    offsets = (days - np.datetime64(start_of_week, 'D')).astype(np.int64)
+    in_week = (offsets >= 0) & (offsets < 7) & (activity_codes >= 0)
+    cells = activity_codes[in_week] * 7 + offsets[in_week]
+
+    n_activities = len(activity_names)
+    grid = np.bincount(cells, weights=durations[in_week], minlength=n_activities * 7)
+    grid = grid.astype(np.int64).reshape(n_activities, 7)
+
+    # Activities with at least one log this week, sorted by name
+    present = np.bincount(activity_codes[in_week], minlength=n_activities) > 0
+    order = sorted(np.flatnonzero(present), key=lambda code: activity_names[code])
+
+    # Distinct comments per cell, in log order
+    comments = [[[] for _ in range(7)] for _ in order]
+    if 'Comment' in logs_df.columns:
+        row_of = dict(zip(order, range(len(order))))
+        has_text = in_week & comment_mask(logs_df['Comment'])
+        texts = logs_df['Comment'].to_numpy(dtype=object)[has_text]
+        for code, offset, text in zip(activity_codes[has_text], offsets[has_text], texts):
+            cell = comments[row_of[code]][offset]
+            if text.strip() not in cell:
+                cell.append(text.strip())
+    comments = [["; ".join(cell) for cell in row] for row in comments]
+
+    return WeekGrid(date_headers, activity_names[order].tolist(), grid[order], comments)
+
+
+@timed("summary.build")
+def build_weekly_summary(logs_df):
+    """Build the Activity x weekday timesheet for the week of the earliest log
+
+    logs_df needs 'Date', 'Activity' and 'Duration (seconds)' columns. The
+    result has one row per activity (each followed by a COMMENT row holding
+    that day's comments, if logs_df has a 'Comment' column), framed by the
+    attendance and daily total rows.
+    """
+    week = weekly_grid(logs_df)
+    grid = week.seconds
+    daily_totals = grid.sum(axis=0)
+    task_totals = grid.sum(axis=1)
+
+    activity_rows = np.empty((len(week.activities), 9), dtype=object)
+    activity_rows[:, 0] = week.activities
+    activity_rows[:, 1:8] = format_hours_minutes(grid)
+    activity_rows[:, 8] = format_hours_minutes(task_totals)
+
+    # Each activity row is followed by a COMMENT row
+    body = np.full((2 * len(week.activities), 9), "", dtype=object)
+    body[0::2] = activity_rows
+    body[1::2, 0] = "COMMENT"
+    if week.activities:
+        body[1::2, 1:8] = np.array(week.comments, dtype=object)
+
+    attendance_row = ['ATTENDANCE HOURS'] + format_hours_minutes(daily_totals, attendance=True).tolist() + [""]
+    totals_row = (["Total hours/day"] + format_hours_minutes(daily_totals).tolist()
+                  + format_hours_minutes([daily_totals.sum()]).tolist())
+
+    data = [attendance_row, [""] * 9] + body.tolist() + [totals_row]
+    columns = [SUMMARY_FIRST_COLUMN] + week.date_headers + [SUMMARY_TOTAL_COLUMN]
+    return pd.DataFrame(data, columns=columns)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+# Rollup tables and the log fields each one totals by, besides the day
+ROLLUP_KEYS = {
+    'deal': ('Record Id', 'Activity'),
+    'company': ('Company Name',),
+    'owner': ('Deal Owner',),
+}
+
+
+class Rollups:
+    """Precomputed durations per day: by deal and activity, by company and by deal owner
+
+    Each table maps a 'YYYY-MM-DD' day to {key: seconds}. Adding a log
+    updates one entry per table, and a query only visits the days in its
+    range, so e.g. the hours per deal this quarter don't depend on how much
+    history there is.
+    """
+
+    def __init__(self):
+        self.tables = {name: {} for name in ROLLUP_KEYS}
+        # Latest Deal Name logged for each Record Id
+        self.deal_names = {}
+
+    def add(self, log):
+        """Add a single log dict"""
+        day = log.get('Date')
+        seconds = log.get('Duration (seconds)') or 0
+        for name, fields in ROLLUP_KEYS.items():
+            totals = self.tables[name].setdefault(day, {})
+            key = tuple(log.get(field) for field in fields)
+            totals[key] = totals.get(key, 0) + seconds
+        if log.get('Record Id') is not None:
+            self.deal_names[log['Record Id']] = log.get('Deal Name')
+
+    def add_totals(self, name, rows):
+        """Add (day, *key, seconds) rows of already summed durations to table `name`"""
+        table = self.tables[name]
+        for row in rows:
+            totals = table.setdefault(row[0], {})
+            key = tuple(row[1:-1])
+            totals[key] = totals.get(key, 0) + row[-1]
+
+    def add_columns(self, logs):
+        """Add every row of a LogColumns
+
+        Rows are grouped by their category codes first, so the strings are
+        only looked up once per distinct key rather than once per log.
+        """
+        columns = logs.columns
+        dates = columns['Date']
+        durations = columns['Duration (seconds)']
+        for name, fields in ROLLUP_KEYS.items():
+            key_columns = [dates] + [columns[field] for field in fields]
+            sums = {}
+            for row in zip(*(column.codes for column in key_columns), durations):
+                codes = row[:-1]
+                sums[codes] = sums.get(codes, 0) + row[-1]
+            self.add_totals(name, (
+                tuple(column.categories[code] if code >= 0 else None
+                      for column, code in zip(key_columns, codes)) + (seconds,)
+                for codes, seconds in sums.items()
+            ))
+
+        record_ids, deal_names = columns['Record Id'], columns['Deal Name']
+        # Later rows overwrite earlier ones, leaving the latest name per Record Id
+        for id_code, name_code in dict(zip(record_ids.codes, deal_names.codes)).items():
+            if id_code >= 0:
+                deal_name = deal_names.categories[name_code] if name_code >= 0 else None
+                self.deal_names[record_ids.categories[id_code]] = deal_name
+
+    def query(self, name, start_date, end_date):
+        """{key: seconds} totals of table `name` from start_date through end_date (inclusive)"""
+        table = self.tables[name]
+        result = {}
+        day = start_date
+        while day <= end_date:
+            for key, seconds in table.get(day.isoformat(), {}).items():
+                result[key] = result.get(key, 0) + seconds
+            day += timedelta(days=1)
+        return result
@@ -0,0 +1,173 @@
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+
+class TrackingSession:
+    """One tracking session, made of the active segments between pauses
+
+    Each segment is stored as [wall clock start timestamp, seconds], where
+    the seconds come from the monotonic clock so clock changes while
+    tracking don't distort the duration.
+    """
+
+    def __init__(self, details, session_id=None):
+        self.id = session_id or uuid.uuid4().hex
+        # Log fields known when the session started (deal, activity, ...)
+        self.details = details
+        self.segments = []
+        self._running_since = None  # (wall, monotonic) start of the running segment
+
+    @property
+    def running(self):
+        return self._running_since is not None
+
+    @property
+    def start_time(self):
+        """Wall clock time the session started"""
+        if self.segments:
+            return self.segments[0][0]
+        return self._running_since[0] if self._running_since else None
+
+    def start(self):
+        """Start (or resume) a segment, returning its wall clock start"""
+        self._running_since = (time.time(), time.monotonic())
+        return self._running_since[0]
+
+    def pause(self):
+        """Close the running segment, returning it"""
+        wall, monotonic = self._running_since
+        segment = [wall, time.monotonic() - monotonic]
+        self.segments.append(segment)
+        self._running_since = None
+        return segment
+
+    def running_seconds(self):
+        """Seconds in the running segment so far"""
+        if self._running_since is None:
+            return 0.0
+        return time.monotonic() - self._running_since[1]
+
+    def elapsed(self):
+        """Active seconds over all segments, including the running one"""
+        return sum(seconds for _, seconds in self.segments) + self.running_seconds()
+
+    def to_log(self, fields, end_time):
+        """Log entry for this session, ending at wall clock time end_time"""
+        end = datetime.fromtimestamp(end_time)
+        log = {'Date': end.strftime('%Y-%m-%d'), 'Timestamp': end_time}
+        log.update(fields)
+        log.update({
+            'Start Time': datetime.fromtimestamp(self.start_time).strftime('%H:%M:%S'),
+            'End Time': end.strftime('%H:%M:%S'),
+            'Duration (seconds)': int(sum(seconds for _, seconds in self.segments)),
+            'Segments': [[round(wall, 3), round(seconds, 3)] for wall, seconds in self.segments],
+        })
+        return log
+
+
+class SessionCheckpoint:
+    """Small append-only journal of session events, for recovering sessions after a crash
+
+    Every start, pause, resume and periodic checkpoint of a session is one
+    short JSON line, so keeping it current never rewrites the time logs.
+    """
+
+    def __init__(self, data_dir):
+        self.checkpoint_file = os.path.join(data_dir, "session_checkpoint.jsonl")
+        self._file = None
+        self._open_sessions = set()
+
+    def record(self, event, session, **fields):
+        """Append one event for session"""
+        if self._file is None:
+            self._file = open(self.checkpoint_file, 'a', encoding='utf-8')
+        entry = {'event': event, 'session': session.id, 'wall': time.time()}
+        entry.update(fields)
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+        if event == 'start':
+            self._open_sessions.add(session.id)
+        elif event == 'stop':
+            self._open_sessions.discard(session.id)
+            if not self._open_sessions:
+                # Nothing left to recover, start the journal afresh
+                self.clear()
+
+    def start(self, session):
+        self.record('start', session, details=session.details, since=session.start())
+
+    def pause(self, session):
+        wall, seconds = session.pause()
+        self.record('pause', session, since=wall, seconds=seconds)
+
+    def resume(self, session):
+        self.record('resume', session, since=session.start())
+
+    def checkpoint(self, session):
+        """Record how long the running segment has lasted so far"""
+        self.record('tick', session, seconds=session.running_seconds())
+
+    def stop(self, session):
+        self.record('stop', session)
+
+    def clear(self):
+        """Drop all recorded events"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def recover(self):
+        """Sessions that were started but never stopped, with their last known end time
+
+        Returns a list of (session, end_time) pairs. The running segment of a
+        session is cut off at its last checkpoint.
+        """
+        if not os.path.exists(self.checkpoint_file):
+            return []
+        sessions = {}
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn write from the crash
+                session_id = entry['session']
+                if entry['event'] == 'start':
+                    session = TrackingSession(entry['details'], session_id)
+                    sessions[session_id] = [session, entry['since'], 0.0, entry['wall']]
+                    continue
+                state = sessions.get(session_id)
+                if state is None:
+                    continue
+                session = state[0]
+                if entry['event'] == 'pause':
+                    session.segments.append([entry['since'], entry['seconds']])
+                    state[1] = None
+                elif entry['event'] == 'resume':
+                    state[1], state[2] = entry['since'], 0.0
+                elif entry['event'] == 'tick':
+                    state[2] = entry['seconds']
+                elif entry['event'] == 'stop':
+                    del sessions[session_id]
+                    continue
+                state[3] = entry['wall']
+
+        recovered = []
+        for session, running_since, running_seconds, last_wall in sessions.values():
+            if running_since is not None:
+                session.segments.append([running_since, running_seconds])
+            recovered.append((session, last_wall))
+        # Still open until each one is stopped, so resolving the first doesn't clear the others
+        self._open_sessions.update(session.id for session, _ in recovered)
+        return recovered
@@ -0,0 +1,195 @@
+"""Optional upload of time logs to a central collector
+
+Set TIMETRACKER_SYNC_URL to a collector's upload URL (sync_collector.py
+is a reference one, e.g. http://localhost:8765/logs) to turn it on. Logs
+are sent under TIMETRACKER_SYNC_USER, or the login name if that isn't set.
+
+A sync cursor in sync_state.json counts the logs already handed over (it
+starts over when the collector URL or user changes). Logs past it are cut
+into batches of up to BATCH_SIZE, gzipped into the sync_queue directory
+and only then uploaded, so batches made while offline (or while the
+collector is down) wait there across restarts. A failed upload is retried
+with exponential backoff. Each batch carries the position of its first
+log, so the collector can ignore a batch it has already stored.
+
+All of this runs on a background thread; the app only calls notify()
+after saving a log.
+"""
+import getpass
+import gzip
+import json
+import os
+import random
+import threading
+
+from instrumentation import timed
+
+SYNC_URL_ENV_VAR = "TIMETRACKER_SYNC_URL"
+SYNC_USER_ENV_VAR = "TIMETRACKER_SYNC_USER"
+STATE_FILE = "sync_state.json"
+QUEUE_DIR = "sync_queue"
+# Logs per uploaded batch
+BATCH_SIZE = 500
+# Seconds to wait after the first failed upload, doubling up to MAX_BACKOFF
+MIN_BACKOFF = 2.0
+MAX_BACKOFF = 300.0
+REQUEST_TIMEOUT = 15
+
+
+def start_sync(data_dir, log_store, environ=None):
+    """Start syncing log_store if TIMETRACKER_SYNC_URL is set; returns the SyncClient or None"""
+    environ = os.environ if environ is None else environ
+    url = environ.get(SYNC_URL_ENV_VAR, "").strip()
+    if not url:
+        return None
+    client = SyncClient(data_dir, log_store, url, environ.get(SYNC_USER_ENV_VAR) or getpass.getuser())
+    client.start()
+    return client
+
+
+class SyncClient:
+    """Queues a log store's new logs in batches and uploads them to a collector"""
+
+    def __init__(self, data_dir, log_store, url, user, batch_size=BATCH_SIZE):
+        self.log_store = log_store
+        self.url = url
+        self.user = user
+        self.batch_size = batch_size
+        self.state_file = os.path.join(data_dir, STATE_FILE)
+        self.queue_dir = os.path.join(data_dir, QUEUE_DIR)
+        self.cursor = self._read_cursor()
+        # Why the last sync failed, None after a successful one
+        self.last_error = None
+
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Sync in the background now and after every notify()"""
+        self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="log-sync", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Tell the background thread new logs were saved"""
+        self._wake.set()
+
+    def close(self, timeout=1.0):
+        """Stop the background thread; anything not uploaded yet stays queued for the next run"""
+        self._closed.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def sync(self):
+        """Queue the logs past the cursor and upload the whole queue, returning the logs uploaded
+
+        Raises the error of the first upload that fails.
+        """
+        self.queue_new_logs()
+        return self.upload_queue()
+
+    def queue_new_logs(self):
+        """Cut the logs past the cursor into gzipped batches in the queue directory"""
+        os.makedirs(self.queue_dir, exist_ok=True)
+        while True:
+            logs = self.log_store.since(self.cursor, self.batch_size)
+            if not logs:
+                return
+            batch = {'user': self.user, 'first': self.cursor, 'logs': logs}
+            # Named by position, so re-queueing after a crash overwrites rather than duplicates
+            path = os.path.join(self.queue_dir, f"batch-{self.cursor:012d}.json.gz")
+            with open(path + ".tmp", 'wb') as f:
+                f.write(gzip.compress(json.dumps(batch).encode('utf-8')))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self.cursor += len(logs)
+            self._write_cursor()
+
+    def pending_batches(self):
+        """Queued batch files, oldest first"""
+        if not os.path.isdir(self.queue_dir):
+            return []
+        return sorted(os.path.join(self.queue_dir, name) for name in os.listdir(self.queue_dir)
+                      if name.startswith("batch-") and name.endswith(".json.gz"))
+
+    def upload_queue(self):
+        """Upload the queued batches in order, removing each once the collector has it"""
+        uploaded = 0
+        import urllib.error
+
+        for path in self.pending_batches():
+            if self._closed.is_set():
+                break
+            with open(path, 'rb') as f:
+                body = f.read()
+            try:
+                count = self._post(body)
+            except urllib.error.HTTPError as e:
+                if 400 <= e.code < 500 and e.code not in (408, 429):
+                    # The collector will never accept it, don't let it hold up the queue
+                    os.replace(path, path + ".rejected")
+                    self.last_error = f"{os.path.basename(path)} rejected by the collector: {e}"
+                    continue
+                raise
+            os.remove(path)
+            uploaded += count
+        return uploaded
+
+    @timed("sync.upload")
+    def _post(self, body):
+        # Imported here, since the app imports this module on every start, with sync configured or not
+        import urllib.request
+
+        request = urllib.request.Request(self.url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+        })
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            return json.loads(response.read() or b"{}").get('received', 0)
+
+    def _run(self):
+        """Background thread: sync whenever notified, backing off while uploads fail"""
+        backoff = 0.0
+        while not self._closed.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed.is_set():
+                break
+            try:
+                self.last_error = None
+                self.sync()
+            except Exception as e:
+                self.last_error = str(e)
+                backoff = min(MAX_BACKOFF, max(MIN_BACKOFF, backoff * 2))
+                # Jitter keeps a team's clients from retrying in lockstep after an outage
+                self._closed.wait(backoff * random.uniform(0.5, 1.0))
+                self._wake.set()
+                continue
+            backoff = 0.0
+
+    def _read_cursor(self):
+        """The saved cursor, or 0 if it was saved for another collector URL or user"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            cursor = state['cursor']
+        except (OSError, ValueError, KeyError):
+            return 0
+        if state.get('url') != self.url or state.get('user') != self.user:
+            # The new collector (or user) has none of the logs yet: drop the batches queued for the
+            # old one and upload the whole history again
+            for path in self.pending_batches():
+                os.remove(path)
+            return 0
+        return cursor
+
+    def _write_cursor(self):
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'cursor': self.cursor, 'user': self.user, 'url': self.url}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.state_file)
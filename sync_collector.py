@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Reference collector for synced time logs, storing them in SQLite
+
+Runs fully offline, so the sync feature can be tried and tested without
+any central service:
+
+    python sync_collector.py --port 8765 --db collected_logs.sqlite3
+    TIMETRACKER_SYNC_URL=http://localhost:8765/logs python time-tracker.py
+
+Clients POST batches {"user", "first", "logs"} as (optionally gzipped)
+JSON to /logs. Every log is stored with its user and position in that
+user's store, which is the primary key, so a batch that is retried after
+a lost response is only stored once. GET /status returns the number of
+logs stored per user.
+"""
+import argparse
+import gzip
+import io
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from log_store import SQLiteLogStore
+
+# Largest request body accepted, compressed or not
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# The same log columns as the app's SQLite store, keyed by user and position
+LOG_COLUMNS = [column for _, column in SQLiteLogStore.COLUMNS]
+SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS time_logs (
+        user TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        {", ".join(LOG_COLUMNS)},
+        received REAL DEFAULT (julianday('now')),
+        PRIMARY KEY (user, position)
+    );
+    CREATE INDEX IF NOT EXISTS idx_time_logs_date ON time_logs (date, user);
+"""
+
+
+class LogCollector:
+    """SQLite database of the logs received from every user"""
+
+    def __init__(self, db_file):
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._insert = (f"INSERT OR IGNORE INTO time_logs (user, position, {', '.join(LOG_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * (len(LOG_COLUMNS) + 2))})")
+
+    def store(self, batch):
+        """Store a batch, returning how many of its logs were new"""
+        user, first, logs = batch['user'], int(batch['first']), batch['logs']
+        if not isinstance(user, str) or not user or not isinstance(logs, list):
+            raise ValueError("batch needs a user name and a list of logs")
+        rows = []
+        for position, log in enumerate(logs, first):
+            row = [log.get(field) for field, _ in SQLiteLogStore.COLUMNS]
+            if row[-1] is not None:
+                row[-1] = json.dumps(row[-1])
+            rows.append([user, position] + row)
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(self._insert, rows)
+            return self.conn.total_changes - before
+
+    def status(self):
+        """{user: logs stored}"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT user, COUNT(*) FROM time_logs GROUP BY user"))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    # Set on the handler class made by make_server()
+    collector = None
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/logs":
+            return self._reply(404, {'error': "not found"})
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            return self._reply(413, {'error': "batch too large"})
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get('Content-Encoding') == 'gzip':
+                # Read at most one byte past the limit, so a small body can't expand without bound
+                body = gzip.GzipFile(fileobj=io.BytesIO(body)).read(MAX_BODY_BYTES + 1)
+                if len(body) > MAX_BODY_BYTES:
+                    return self._reply(413, {'error': "batch too large"})
+            batch = json.loads(body)
+            stored = self.collector.store(batch)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            return self._reply(400, {'error': f"invalid batch: {e}"})
+        self._reply(200, {'received': len(batch['logs']), 'stored': stored})
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/status":
+            return self._reply(404, {'error': "not found"})
+        self._reply(200, {'users': self.collector.status()})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host, port, db_file):
+    """HTTP server storing received logs in db_file; port 0 picks a free port"""
+    handler = type("Handler", (CollectorHandler,), {'collector': LogCollector(db_file)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference collector for synced time logs")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--db", default="collected_logs.sqlite3", help="SQLite database to store logs in")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.db)
+    print(f"Collecting time logs into {args.db} at http://{args.host}:{server.server_port}/logs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.RequestHandlerClass.collector.close()
+
+
+if __name__ == "__main__":
+    main()
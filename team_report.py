@@ -0,0 +1,212 @@
+"""Team timesheets aggregated from many users' log stores
+
+A team directory holds one log directory per user (the user's data
+directory copied over, or a store the user syncs to), e.g.
+
+    team/
+        alice/time_logs_data.json
+        bob/time_logs.sqlite3
+
+Every store is aggregated in its own worker process and only the small
+per day, activity and opportunity totals come back, so hundreds of users
+with years of history take about as long as the largest store divided by
+the number of cores.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from deal_index import format_opportunity
+from instrumentation import timed
+from log_store import open_log_store
+from reports import SUMMARY_TOTAL_COLUMN, WeeklyTotals, split_iso_weeks
+from time_utils import format_hours_minutes, parse_dates
+
+# First column of the per-user total rows, which the team total row adds up
+USER_TOTAL_LABEL = "Total hours/day"
+
+# Fields the team totals are kept by
+TEAM_KEYS = ('Date', 'Activity', 'Record Id', 'Deal Name')
+
+# User x activity x opportunity durations of one week: date_headers (7 'MON D'
+# labels) and users, a list of (user, [(activity, opportunity, 7 day seconds)])
+# sorted by user, activity and opportunity
+TeamWeekGrid = namedtuple('TeamWeekGrid', ['date_headers', 'users'])
+
+# Files that mark a directory as a user's log store
+STORE_FILES = ("time_logs_data.json", "time_logs_journal.jsonl", "time_logs.sqlite3")
+
+
+def find_user_stores(team_dir):
+    """Log directories directly under team_dir, sorted by user name"""
+    stores = []
+    for entry in sorted(os.scandir(team_dir), key=lambda entry: entry.name):
+        if entry.is_dir() and any(os.path.exists(os.path.join(entry.path, name)) for name in STORE_FILES):
+            stores.append(entry.path)
+    return stores
+
+
+def aggregate_store(store_dir, start_date, end_date, engine=None):
+    """Duration totals by TEAM_KEYS for one user's logs in a date range
+
+    Runs in a worker process. The store is read in chunks and only the
+    totals are returned, which keeps both memory use and the result
+    shipped back to the parent small. Returns (totals frame, load errors).
+    """
+    store = open_log_store(store_dir, engine=engine, read_only=True)
+    totals = WeeklyTotals(keys=TEAM_KEYS)
+    try:
+        store.load()
+        for logs in store.iter_range(start_date, end_date):
+            totals.add(logs.to_frame())
+    finally:
+        store.close()
+    return totals.frame(), store.load_errors
+
+
+@timed("team.aggregate")
+def aggregate_team(team_dir, start_date, end_date, engine=None, max_workers=None, progress=None):
+    """Aggregate every user's store under team_dir, in parallel
+
+    Returns (totals, errors): a frame of TEAM_KEYS plus 'User' and
+    'Duration (seconds)' columns, and messages for stores that could not
+    be read (those users are left out). max_workers=1 aggregates in this
+    process instead of starting a pool.
+    """
+    progress = progress or (lambda message: None)
+    stores = find_user_stores(team_dir)
+    frames = []
+    errors = []
+
+    def collect(store_dir, result):
+        totals_df, load_errors = result
+        user = os.path.basename(store_dir)
+        errors.extend(f"{user}: {error}" for error in load_errors)
+        frames.append(totals_df.assign(User=user))
+        progress(f"Aggregated {len(frames)} of {len(stores)} users")
+
+    if max_workers == 1:
+        for store_dir in stores:
+            try:
+                collect(store_dir, aggregate_store(store_dir, start_date, end_date, engine))
+            except Exception as e:
+                errors.append(f"{os.path.basename(store_dir)}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(aggregate_store, store_dir, start_date, end_date, engine): store_dir
+                for store_dir in stores
+            }
+            for future in as_completed(futures):
+                try:
+                    collect(futures[future], future.result())
+                except Exception as e:
+                    errors.append(f"{os.path.basename(futures[future])}: {e}")
+
+    if not frames:
+        return pd.DataFrame(columns=['User'] + list(TEAM_KEYS) + ['Duration (seconds)']), errors
+    return pd.concat(frames, ignore_index=True), errors
+
+
+def team_weekly_grid(totals_df):
+    """The TeamWeekGrid of the week of the earliest total"""
+    days = parse_dates(totals_df['Date'])
+
+    # Monday of the week the earliest log falls in
+    min_date = days.min().item()
+    start_of_week = min_date - timedelta(days=min_date.weekday())
+    date_range = [start_of_week + timedelta(days=i) for i in range(7)]
+    date_headers = [f"{d.strftime('%b').upper()} {d.day}" for d in date_range]
+
+    # Only totals within that week are counted
+    offsets = (days - np.datetime64(start_of_week, 'D')).astype(np.int64)
+    in_week = (offsets >= 0) & (offsets < 7)
+    week_df = totals_df[in_week]
+    # Opportunities are labelled as in the Opportunity combobox; missing values are NaN
+    opportunities = [
+        format_opportunity(deal_name, record_id) if isinstance(record_id, str)
+        else deal_name if isinstance(deal_name, str) else ""
+        for deal_name, record_id in zip(week_df['Deal Name'].astype(object), week_df['Record Id'].astype(object))
+    ]
+    week_df = pd.DataFrame({
+        'User': week_df['User'].astype(object).to_numpy(),
+        'Activity': week_df['Activity'].astype(object).fillna("").to_numpy(),
+        'Opportunity': opportunities,
+        'Day': offsets[in_week],
+        'Duration (seconds)': week_df['Duration (seconds)'].to_numpy(dtype=np.int64),
+    })
+
+    # User x activity x opportunity rows, one column per weekday
+    grid = (week_df.groupby(['User', 'Activity', 'Opportunity', 'Day'])['Duration (seconds)'].sum()
+            .unstack('Day', fill_value=0)
+            .reindex(columns=range(7), fill_value=0))
+    users = []
+    for user, user_grid in grid.groupby(level='User', sort=True):
+        rows = zip(user_grid.index.get_level_values('Activity'), user_grid.index.get_level_values('Opportunity'),
+                   user_grid.to_numpy())
+        users.append((user, list(rows)))
+    return TeamWeekGrid(date_headers, users)
+
+
+def build_team_weekly_summary(totals_df):
+    """Build the team timesheet for the week of the earliest total
+
+    Like the weekly timesheet, with one row per user, activity and
+    opportunity, a total row per user and the team's totals around them.
+    """
+    week = team_weekly_grid(totals_df)
+    all_values = [seconds for _, rows in week.users for _, _, seconds in rows]
+    daily_totals = np.sum(all_values, axis=0, dtype=np.int64) if all_values else np.zeros(7, dtype=np.int64)
+
+    data = [['TEAM ATTENDANCE HOURS', "", ""] + format_hours_minutes(daily_totals, attendance=True).tolist() + [""],
+            [""] * 11]
+    for user, user_rows in week.users:
+        values = np.array([seconds for _, _, seconds in user_rows], dtype=np.int64)
+        rows = np.empty((len(user_rows), 11), dtype=object)
+        rows[:, 0] = user
+        rows[:, 1] = [activity for activity, _, _ in user_rows]
+        rows[:, 2] = [opportunity for _, opportunity, _ in user_rows]
+        rows[:, 3:10] = format_hours_minutes(values)
+        rows[:, 10] = format_hours_minutes(values.sum(axis=1))
+        data.extend(rows.tolist())
+
+        user_totals = values.sum(axis=0)
+        data.append([user, USER_TOTAL_LABEL, ""] + format_hours_minutes(user_totals).tolist()
+                    + format_hours_minutes([user_totals.sum()]).tolist())
+        data.append([""] * 11)
+
+    data.append(["Team total hours/day", "", ""] + format_hours_minutes(daily_totals).tolist()
+                + format_hours_minutes([daily_totals.sum()]).tolist())
+    columns = ['USER', 'ACTIVITY', 'OPPORTUNITY'] + week.date_headers + [SUMMARY_TOTAL_COLUMN]
+    return pd.DataFrame(data, columns=columns)
+
+
+def export_team_report(totals_df, file_path, format_type):
+    """Write one team timesheet per ISO week covered by totals_df
+
+    format_type is "csv" (the weeks one after another, each under its own
+    heading) or "excel" (one sheet per week).
+    """
+    weeks = split_iso_weeks(totals_df)
+    if format_type == "csv":
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            for index, ((iso_year, iso_week), week_df) in enumerate(weeks):
+                if index:
+                    f.write("\n")
+                f.write(f"Week {iso_year}-W{iso_week:02d}\n")
+                build_team_weekly_summary(week_df).to_csv(f, index=False)
+        return
+
+    from openpyxl import Workbook
+    from timesheet_excel import write_team_timesheet
+
+    # Every sheet shares the workbook's named styles
+    workbook = Workbook(write_only=True)
+    for (iso_year, iso_week), week_df in weeks:
+        write_team_timesheet(workbook, f"Team {iso_year}-W{iso_week:02d}", team_weekly_grid(week_df),
+                             SUMMARY_TOTAL_COLUMN, USER_TOTAL_LABEL)
+    workbook.save(file_path)
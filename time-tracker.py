@@ -1,18 +1,68 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
-import csv
 import os
-import json
-import calendar
 import shutil
-from collections import defaultdict
 from resource_path import resource_path
+from log_store import open_log_store
+from app_paths import crm_data_path, get_app_data_dir
+from crm_cache import InvalidCRMFile, import_crm_file, load_crm_frame
+from deal_index import DealIndex, deals_from_frame, diff_deals, format_opportunity, parse_opportunity
+from background_jobs import JobRunner
+from timer_ticks import TickScheduler
+from time_utils import format_elapsed, parse_date
+from sessions import SessionCheckpoint, TrackingSession
+from sync_client import start_sync
+import instrumentation
+from instrumentation import timed
+
+# Number of deals shown in the Opportunity dropdown at a time
+OPPORTUNITY_MATCH_LIMIT = 50
+# Delay after the last keystroke before the Opportunity matches are refreshed
+OPPORTUNITY_SEARCH_DELAY_MS = 200
+# How often the running segment is checkpointed for crash recovery
+CHECKPOINT_INTERVAL_MS = 30000
+
+
+def preload_modules():
+    """Import the heavy data modules ahead of their first use"""
+    # pandas/numpy/openpyxl dominate startup, so they are only imported here
+    # (on a background thread) and lazily where they are used
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    import reports  # noqa: F401
+
+
+class TimerRow:
+    """Widgets of one concurrent timer: what is tracked, its elapsed time and its buttons"""
+
+    def __init__(self, parent, session, on_pause, on_stop):
+        self.session = session
+        details = session.details
+        self.frame = tk.Frame(parent)
+        self.frame.pack(fill="x", pady=2)
+        
+        title = f"{details['Deal Name']} - {details['Activity']}"
+        if details.get('Comment'):
+            title += f" ({details['Comment']})"
+        tk.Label(self.frame, text=title, anchor="w", width=45).pack(side=tk.LEFT, padx=5)
+        self.elapsed_label = tk.Label(self.frame, text="00:00:00", font=('Arial', 14))
+        self.elapsed_label.pack(side=tk.LEFT, padx=5)
+        self.pause_btn = tk.Button(self.frame, text="Pause", command=on_pause)
+        self.pause_btn.pack(side=tk.LEFT, padx=5)
+        tk.Button(self.frame, text="Stop", command=on_stop).pack(side=tk.LEFT, padx=5)
+
+    def draw(self, text):
+        self.elapsed_label.config(text=text)
+
+    def destroy(self):
+        self.frame.destroy()
+
 
 class TimeTrackerApp:
     def __init__(self, root):
+        self.started = time.perf_counter()
         self.root = root
         self.root.title("Opportunity Time Tracker")
         
@@ -23,10 +73,13 @@ class TimeTrackerApp:
             pass  # Silently fail if icon doesn't exist
         
         # Initialize time logs storage
-        self.app_data_dir = self.get_app_data_dir()
-        self.time_logs_file = os.path.join(self.app_data_dir, "time_logs_data.json")
-        self.crm_data_file = os.path.join(self.app_data_dir, "crm_data.xlsx")
-        self.time_logs = self.load_time_logs()
+        self.app_data_dir = get_app_data_dir()
+        self.crm_data_file = crm_data_path(self.app_data_dir)
+        # Opt-in timing of the major operations (TIMETRACKER_METRICS=1)
+        instrumentation.configure(self.app_data_dir)
+        self.log_store = open_log_store(self.app_data_dir)
+        with timed("startup.load_logs"):
+            self.load_time_logs()
         
         # Define roles and activities
         self.roles = ["Pre-Sales"]  # Default role for now, can be expanded later
@@ -43,76 +96,154 @@ class TimeTrackerApp:
             "Administrative Tasks"
         ]
         
-        self.current_timer = None
-        self.start_time = None
-        self.running = False
+        self.checkpoint_job = None
+        # Concurrent timers by session id, in the order they were started
+        self.timers = {}
+        self.checkpoint = SessionCheckpoint(self.app_data_dir)
+        # One tick chain redraws all running timers
+        self.ticks = TickScheduler(self.root, lambda: self.root.state() in ('iconic', 'withdrawn'))
         self.df = None
+        self.deal_index = None
+        self.opportunity_search_job = None
         
         # GUI Setup - Create main window structure first
-        self.setup_main_window()
+        with timed("startup.window"):
+            self.setup_main_window()
+        
+        # File I/O runs on a background worker so the window stays responsive
+        self.jobs = JobRunner(self.root, on_status=self.show_status)
+        
+        # Offer to save sessions that were interrupted by a crash
+        self.recover_sessions()
         
         # Load CRM data or prompt user to select a file
         self.load_crm_data()
         
+        # Then warm up the export modules while the user is busy
+        self.jobs.submit(preload_modules)
+        # Build the effort rollups in the background too, so analytics exports are instant
+        self.jobs.submit(self.log_store.rollups)
+        # Upload new logs to a collector in the background, if TIMETRACKER_SYNC_URL is set
+        self.sync = start_sync(self.app_data_dir, self.log_store)
+        # Registered last, since on_close shuts down everything created above
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        instrumentation.record("startup.init", time.perf_counter() - self.started)
+        
     def setup_main_window(self):
         """Set up the main window structure"""
         # Main content frame
         self.main_frame = tk.Frame(self.root, padx=10, pady=10)
         self.main_frame.pack(fill="both", expand=True)
         
+        # The timer stops ticking while minimized and picks up again here
+        self.root.bind("<Map>", self.on_window_mapped)
+        
         # Create a placeholder for the main interface
         # The actual widgets will be created after we have CRM data
         self.placeholder_frame = tk.Frame(self.main_frame)
         self.placeholder_frame.pack(fill="both", expand=True)
-        
-    def get_app_data_dir(self):
-        """Get or create application data directory"""
-        # Create an app-specific data directory in user's home
-        if os.name == 'nt':  # Windows
-            app_data = os.path.join(os.environ['APPDATA'], 'TimeTracker')
-        else:  # macOS and Linux
-            app_data = os.path.join(os.path.expanduser('~'), '.timetracker')
-            
-        # Create directory if it doesn't exist
-        if not os.path.exists(app_data):
-            os.makedirs(app_data)
-            
-        return app_data
+        tk.Label(self.placeholder_frame, text="Loading...").pack(pady=20)
+        
+        # Status bar with a progress indicator, shown while background jobs run
+        self.status_frame = tk.Frame(self.main_frame)
+        self.status_label = tk.Label(self.status_frame, text="", fg="gray")
+        self.status_label.pack(side=tk.LEFT)
+        self.progress_bar = ttk.Progressbar(self.status_frame, mode='indeterminate', length=120)
+        self.progress_bar.pack(side=tk.RIGHT)
+        
+    def show_status(self, message):
+        """Show a background job's status, or hide the status bar when message is None"""
+        if message is None:
+            self.progress_bar.stop()
+            self.status_frame.pack_forget()
+            return
+        self.status_label.config(text=message)
+        if not self.status_frame.winfo_ismapped():
+            self.status_frame.pack(side=tk.BOTTOM, fill="x", pady=(5, 0))
+            self.progress_bar.start(10)
         
     def load_time_logs(self):
-        """Load existing time logs from JSON file"""
-        if os.path.exists(self.time_logs_file):
-            try:
-                with open(self.time_logs_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                messagebox.showwarning("Warning", f"Failed to load existing time logs: {str(e)}")
-        return []
-        
-    def save_time_logs(self):
-        """Save time logs to JSON file for persistence"""
+        """Open the time log store"""
         try:
-            with open(self.time_logs_file, 'w') as f:
-                json.dump(self.time_logs, f)
+            self.log_store.load()
         except Exception as e:
-            messagebox.showwarning("Warning", f"Failed to save time logs: {str(e)}")
+            messagebox.showwarning("Warning", f"Failed to load existing time logs: {str(e)}")
+        for error in self.log_store.load_errors:
+            messagebox.showwarning("Warning", f"Failed to load existing time logs: {error}")
+        
+    def save_time_logs(self, log, session=None):
+        """Append a time log to the log store for persistence
+        
+        Once it is saved, the session it came from no longer needs recovering.
+        """
+        def on_saved(_):
+            if session is not None:
+                self.checkpoint.stop(session)
+            if self.sync is not None:
+                self.sync.notify()
+            if hasattr(self, 'logs_info_label'):
+                self.logs_info_label.config(text=f"Saved logs: {self.log_store.count()}")
+        
+        self.jobs.submit(
+            self.log_store.append, log,
+            on_done=on_saved,
+            on_error=lambda e: messagebox.showwarning("Warning", f"Failed to save time logs: {str(e)}")
+        )
+
+    def recover_sessions(self):
+        """Offer to save sessions that were still being tracked when the app last exited"""
+        for session, end_time in self.checkpoint.recover():
+            tracked = int(sum(seconds for _, seconds in session.segments))
+            details = session.details
+            if tracked > 0 and messagebox.askyesno(
+                    "Recover Session",
+                    f"Time Tracker was closed while tracking:\n\n"
+                    f"{details['Deal Name']} - {details['Activity']}\n"
+                    f"Tracked time: {format_elapsed(tracked)}\n\n"
+                    f"Save it to your time logs?"):
+                self.save_time_logs(session.to_log(details, end_time), session)
+            else:
+                self.checkpoint.stop(session)
+
+    def on_close(self):
+        """Finish pending jobs and flush writes before the window closes"""
+        try:
+            for timer in self.timers.values():
+                if timer.session.running:
+                    # Keep the time tracked so far recoverable on the next start
+                    self.checkpoint.checkpoint(timer.session)
+            # Saves still in flight mark their sessions stopped in their callbacks, so run those
+            # before the checkpoint closes; otherwise the next start would offer to save them again
+            self.jobs.shutdown(run_callbacks=True)
+            self.checkpoint.close()
+            if self.sync is not None:
+                self.sync.close()
+            self.log_store.close()
+            instrumentation.close()
+        finally:
+            self.root.destroy()
 
     def load_crm_data(self):
         """Load CRM data from file or prompt user to select a file"""
         # Check if we have a saved CRM data file
         if os.path.exists(self.crm_data_file):
-            try:
-                self.df = pd.read_excel(self.crm_data_file)
-                if len(self.df) > 0:
-                    self.create_widgets()
-                    return
-            except Exception as e:
-                # If there's an error, we'll prompt the user for a new file
-                pass
+            # Read it in the background; if there's an error, we'll prompt the user for a new file
+            self.jobs.submit(load_crm_frame, self.crm_data_file,
+                             on_done=self.on_saved_crm_data_loaded,
+                             on_error=lambda e: self.prompt_for_crm_file(),
+                             status="Loading CRM data...")
+            return
         
         # We didn't find a valid saved file, so ask the user to upload one
         self.prompt_for_crm_file()
     
+    def on_saved_crm_data_loaded(self, df):
+        """Use the saved CRM data unless it turned out to be empty"""
+        if len(df) > 0:
+            self.set_crm_data(df)
+        else:
+            self.prompt_for_crm_file()
+    
     def prompt_for_crm_file(self):
         """Show interface for loading a CRM data file"""
         # Clear placeholder
@@ -158,17 +289,20 @@ class TimeTrackerApp:
     
     def use_sample_data(self):
         """Use sample data from resources (if available)"""
-        try:
-            sample_file = resource_path("Kapil-Dutta-Open-Deals.xlsx")
-            if os.path.exists(sample_file):
-                # Copy the sample file to the app data directory
-                shutil.copy(sample_file, self.crm_data_file)
-                self.df = pd.read_excel(self.crm_data_file)
-                self.create_widgets()
-            else:
-                messagebox.showerror("Error", "Sample data file not found. Please select your own file.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load sample data: {str(e)}")
+        sample_file = resource_path("Kapil-Dutta-Open-Deals.xlsx")
+        if not os.path.exists(sample_file):
+            messagebox.showerror("Error", "Sample data file not found. Please select your own file.")
+            return
+        
+        def copy_and_load():
+            # Copy the sample file to the app data directory
+            shutil.copy(sample_file, self.crm_data_file)
+            return load_crm_frame(self.crm_data_file)
+        
+        self.jobs.submit(copy_and_load,
+                         on_done=self.set_crm_data,
+                         on_error=lambda e: messagebox.showerror("Error", f"Failed to load sample data: {str(e)}"),
+                         status="Loading sample data...")
     
     def select_crm_file(self):
         """Allow user to select a CRM data file"""
@@ -177,29 +311,81 @@ class TimeTrackerApp:
             filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
         )
         
-        if file_path:
-            try:
-                # Try to load the selected file
-                temp_df = pd.read_excel(file_path)
-                
-                # Validate that it has the required columns
-                required_columns = ['Record Id', 'Deal Name', 'Company Name (Company Name)', 'Deal Owner']
-                missing_columns = [col for col in required_columns if col not in temp_df.columns]
-                
-                if missing_columns:
-                    messagebox.showerror("Invalid File", 
-                                        f"The selected file is missing the following required columns: {', '.join(missing_columns)}\n\n"
-                                        "Please select a file with the correct format.")
-                    return
-                
-                # Copy to app data directory and use it
-                shutil.copy(file_path, self.crm_data_file)
-                self.df = temp_df
-                self.create_widgets()
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load the selected file: {str(e)}")
+        if not file_path:
+            return
+        if self.deal_index is None:
+            # Validate the selected file, copy it to the app data directory and use it
+            self.jobs.submit(import_crm_file, file_path, self.crm_data_file,
+                             on_done=self.set_crm_data,
+                             on_error=self.on_crm_file_error,
+                             status="Loading CRM data file...")
+        else:
+            # Refreshing the CRM data: only apply what changed since the current file
+            self.jobs.submit(self.diff_crm_file, file_path,
+                             on_done=self.apply_crm_changes,
+                             on_error=self.on_crm_file_error,
+                             status="Comparing CRM data file...")
+    
+    def diff_crm_file(self, file_path):
+        """Import a new CRM file and compare it with the current deals (runs as a job)
+        
+        Returns (df, changes, orphaned) where orphaned maps the Record Ids of
+        removed deals that have logged time to their logged deal name.
+        """
+        df = import_crm_file(file_path, self.crm_data_file)
+        changes = diff_deals(self.deal_index.deals, deals_from_frame(df))
+        logged_deals = self.log_store.rollups().deal_names
+        orphaned = {record_id: logged_deals[record_id] for record_id in changes.deleted
+                    if record_id in logged_deals}
+        return df, changes, orphaned
+    
+    def apply_crm_changes(self, result):
+        """Update the deal index and Opportunity list in place and report the changes"""
+        df, changes, orphaned = result
+        self.df = df
+        selected = self.opportunity_combo.get()
+        with timed("crm.refresh"):
+            self.deal_index.apply(changes)
+        
+        # Show a renamed deal's new name if it is the selected one
+        _, record_id = parse_opportunity(selected)
+        if record_id in changes.updated:
+            self.opportunity_combo.set(format_opportunity(changes.updated[record_id][0], record_id))
+        if self.deal_index.lookup(record_id) is not None:
+            # A deal is selected rather than being searched for, list deals as on startup
+            self.opportunity_combo['values'] = self.deal_index.search("", OPPORTUNITY_MATCH_LIMIT)
+        else:
+            self.refresh_opportunity_matches()
+        
+        message = f"CRM data updated: {changes.summary()}." if changes else "The CRM data is unchanged."
+        if orphaned:
+            listed = [format_opportunity(deal_name, record_id) for record_id, deal_name in sorted(orphaned.items())]
+            if len(listed) > 10:
+                listed = listed[:10] + [f"...and {len(listed) - 10} more"]
+            message += ("\n\nThese deals have logged time but are no longer in the CRM data:\n"
+                        + "\n".join(listed))
+        messagebox.showinfo("CRM Data Updated", message)
     
+    def on_crm_file_error(self, error):
+        """Report why a selected CRM data file couldn't be used"""
+        if isinstance(error, InvalidCRMFile):
+            messagebox.showerror("Invalid File", 
+                                f"{error}\n\n"
+                                "Please select a file with the correct format.")
+        else:
+            messagebox.showerror("Error", f"Failed to load the selected file: {str(error)}")
+    
+    def set_crm_data(self, df):
+        """Use df as the CRM data, rebuilding the deal index and the widgets"""
+        first_load = self.deal_index is None
+        self.df = df
+        with timed("crm.index"):
+            self.deal_index = DealIndex(df)
+        self.create_widgets()
+        if first_load:
+            # Time from launch until the tracker can be used
+            instrumentation.record("startup.ready", time.perf_counter() - self.started)
+
     def create_widgets(self):
         """Create the main application widgets after loading CRM data"""
         # Clear placeholder frame
@@ -232,9 +418,11 @@ class TimeTrackerApp:
         # Opportunity Selection
         tk.Label(selection_frame, text="Opportunity:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
         self.opportunity_combo = ttk.Combobox(selection_frame, 
-                                            values=[f"{row['Deal Name']} ({row['Record Id']})" for _, row in self.df.iterrows()],
+                                            values=self.deal_index.search("", OPPORTUNITY_MATCH_LIMIT),
                                             width=40)
         self.opportunity_combo.grid(row=2, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+        # Type to search by deal, company or Record Id; the dropdown shows the top matches
+        self.opportunity_combo.bind("<KeyRelease>", self.on_opportunity_typed)
         
         # Optional Comment Field
         tk.Label(selection_frame, text="Comments:").grid(row=3, column=0, padx=5, pady=5, sticky="w")
@@ -245,22 +433,15 @@ class TimeTrackerApp:
         timer_frame = tk.LabelFrame(self.placeholder_frame, text="Time Tracking")
         timer_frame.pack(fill="x", padx=5, pady=10)
         
-        # Timer Display
-        self.timer_label = tk.Label(timer_frame, text="00:00:00", font=('Arial', 20))
-        self.timer_label.pack(pady=10)
-        
-        # Timer Control Buttons
-        timer_control_frame = tk.Frame(timer_frame)
-        timer_control_frame.pack(pady=5)
+        # Start a new timer for the selection above; several can run at once
+        self.start_btn = tk.Button(timer_frame, text="Start", command=self.start_timer)
+        self.start_btn.pack(pady=5)
         
-        self.start_btn = tk.Button(timer_control_frame, text="Start", command=self.start_timer)
-        self.start_btn.pack(side=tk.LEFT, padx=5)
-        
-        self.pause_btn = tk.Button(timer_control_frame, text="Pause", command=self.pause_timer, state='disabled')
-        self.pause_btn.pack(side=tk.LEFT, padx=5)
-        
-        self.stop_btn = tk.Button(timer_control_frame, text="Stop", command=self.stop_timer, state='disabled')
-        self.stop_btn.pack(side=tk.LEFT, padx=5)
+        # One row per timer, with its own elapsed time and Pause/Stop buttons
+        self.timers_frame = tk.Frame(timer_frame)
+        self.timers_frame.pack(fill="x", pady=5)
+        self.no_timers_label = tk.Label(self.timers_frame, text="No timers running", fg="gray")
+        self.no_timers_label.pack()
         
         # ========== Export Section ==========
         export_frame = tk.LabelFrame(self.placeholder_frame, text="Export Options")
@@ -292,144 +473,180 @@ class TimeTrackerApp:
                                                 command=lambda: self.export_logs("excel", "weekly"))
         self.export_weekly_excel_btn.pack(side=tk.LEFT, padx=5)
         
+        # Custom date range export options (one timesheet per ISO week)
+        range_frame = tk.Frame(export_frame)
+        range_frame.pack(fill="x", pady=5)
+        
+        today = datetime.now().date()
+        tk.Label(range_frame, text="Date Range:").pack(side=tk.LEFT, padx=5)
+        self.range_start_entry = tk.Entry(range_frame, width=11)
+        self.range_start_entry.insert(0, today.replace(day=1).strftime('%Y-%m-%d'))
+        self.range_start_entry.pack(side=tk.LEFT)
+        tk.Label(range_frame, text="to").pack(side=tk.LEFT, padx=2)
+        self.range_end_entry = tk.Entry(range_frame, width=11)
+        self.range_end_entry.insert(0, today.strftime('%Y-%m-%d'))
+        self.range_end_entry.pack(side=tk.LEFT)
+        
+        self.export_range_csv_btn = tk.Button(range_frame, text="CSV", 
+                                             command=lambda: self.export_range("csv"))
+        self.export_range_csv_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.export_range_excel_btn = tk.Button(range_frame, text="Excel", 
+                                               command=lambda: self.export_range("excel"))
+        self.export_range_excel_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Effort analytics for the current quarter (hours per deal, company and deal owner)
+        analytics_frame = tk.Frame(export_frame)
+        analytics_frame.pack(fill="x", pady=5)
+        
+        tk.Label(analytics_frame, text="Quarter Analytics:").pack(side=tk.LEFT, padx=5)
+        self.export_analytics_csv_btn = tk.Button(analytics_frame, text="CSV", 
+                                                 command=lambda: self.export_analytics("csv"))
+        self.export_analytics_csv_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.export_analytics_excel_btn = tk.Button(analytics_frame, text="Excel", 
+                                                   command=lambda: self.export_analytics("excel"))
+        self.export_analytics_excel_btn.pack(side=tk.LEFT, padx=5)
+        
         # Show current logs count
-        self.logs_info_label = tk.Label(self.placeholder_frame, text=f"Saved logs: {len(self.time_logs)}")
+        self.logs_info_label = tk.Label(self.placeholder_frame, text=f"Saved logs: {self.log_store.count()}")
         self.logs_info_label.pack(pady=5)
 
+    def on_opportunity_typed(self, event):
+        """Debounce keystrokes in the Opportunity field before searching"""
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if self.opportunity_search_job is not None:
+            self.root.after_cancel(self.opportunity_search_job)
+        self.opportunity_search_job = self.root.after(OPPORTUNITY_SEARCH_DELAY_MS,
+                                                      self.refresh_opportunity_matches)
+
+    def refresh_opportunity_matches(self):
+        """Show the deals matching the Opportunity text in the dropdown"""
+        self.opportunity_search_job = None
+        self.opportunity_combo['values'] = self.deal_index.search(self.opportunity_combo.get(),
+                                                                  OPPORTUNITY_MATCH_LIMIT)
+
+    def selected_log_fields(self):
+        """Log fields for the current project selection and comment"""
+        deal_name, record_id = parse_opportunity(self.opportunity_combo.get())
+        
+        # Look up the deal in the index built when the CRM data was loaded
+        deal = self.deal_index.lookup(record_id)
+        if deal is not None:
+            deal_name, company, owner = deal
+        else:
+            company = "Unknown"
+            owner = "Unknown"
+        
+        return {
+            'Record Id': record_id,
+            'Deal Name': deal_name,
+            'Company Name': company,
+            'Deal Owner': owner,
+            'Role': self.role_combo.get(),
+            'Activity': self.activity_combo.get(),
+            'Comment': self.comment_entry.get(),
+        }
+
     def start_timer(self):
-        if not self.running:
-            # Validate required fields
-            if not self.opportunity_combo.get():
-                messagebox.showwarning("Warning", "Please select an opportunity!")
-                return
-            if not self.activity_combo.get():
-                messagebox.showwarning("Warning", "Please select an activity type!")
-                return
-            
-            self.running = True
-            self.start_time = time.time()
-            self.start_btn.config(state='disabled')
-            self.pause_btn.config(state='normal')
-            self.stop_btn.config(state='normal')
-            self.update_timer()
+        """Start a new timer for the current selection, alongside any running ones"""
+        # Validate required fields
+        if not self.opportunity_combo.get():
+            messagebox.showwarning("Warning", "Please select an opportunity!")
+            return
+        if not self.activity_combo.get():
+            messagebox.showwarning("Warning", "Please select an activity type!")
+            return
+        
+        session = TrackingSession(self.selected_log_fields())
+        self.checkpoint.start(session)
+        timer = TimerRow(self.timers_frame, session,
+                         on_pause=lambda: self.pause_timer(session.id),
+                         on_stop=lambda: self.stop_timer(session.id))
+        self.no_timers_label.pack_forget()
+        self.timers[session.id] = timer
+        self.ticks.add(session.id, session.elapsed, timer.draw)
+        self.schedule_checkpoint()
+        
+        # Clear the comment field for the next timer
+        self.comment_entry.delete(0, tk.END)
 
-    def pause_timer(self):
-        if self.running:
-            self.running = False
-            self.root.after_cancel(self.current_timer)
-            self.start_btn.config(state='normal', text='Resume')
-            self.pause_btn.config(state='disabled')
+    def pause_timer(self, session_id):
+        """Pause a running timer, or resume a paused one"""
+        timer = self.timers[session_id]
+        session = timer.session
+        if session.running:
+            self.checkpoint.pause(session)
+            self.ticks.remove(session_id)
+            timer.draw(format_elapsed(int(session.elapsed())))
+            timer.pause_btn.config(text='Resume')
+        else:
+            # Resuming adds a new active segment to the same session
+            self.checkpoint.resume(session)
+            self.ticks.add(session_id, session.elapsed, timer.draw)
+            timer.pause_btn.config(text='Pause')
+            self.schedule_checkpoint()
 
-    def stop_timer(self):
-        if self.start_time:
-            end_time = time.time()
-            self.running = False
-            self.root.after_cancel(self.current_timer)
-            
-            # Get opportunity details
-            selected_opp = self.opportunity_combo.get()
-            record_id = selected_opp.split('(')[-1].strip(')')
-            deal_name = selected_opp.split('(')[0].strip()
-            
-            # Find the corresponding row in the DataFrame
-            row = self.df[self.df['Record Id'] == record_id]
-            if not row.empty:
-                company = row['Company Name (Company Name)'].iloc[0]
-                owner = row['Deal Owner'].iloc[0]
-            else:
-                company = "Unknown"
-                owner = "Unknown"
-            
-            current_time = datetime.now()
-            
-            # Get role and activity
-            role = self.role_combo.get()
-            activity = self.activity_combo.get()
-            comment = self.comment_entry.get()
-            
-            self.time_logs.append({
-                'Date': current_time.strftime('%Y-%m-%d'),
-                'Timestamp': current_time.timestamp(),  # Store timestamp for accurate weekly filtering
-                'Record Id': record_id,
-                'Deal Name': deal_name,
-                'Company Name': company,
-                'Deal Owner': owner,
-                'Role': role,
-                'Activity': activity,
-                'Comment': comment,
-                'Start Time': datetime.fromtimestamp(self.start_time).strftime('%H:%M:%S'),
-                'End Time': datetime.fromtimestamp(end_time).strftime('%H:%M:%S'),
-                'Duration (seconds)': int(end_time - self.start_time)
-            })
-            
-            # Save time logs to file for persistence
-            self.save_time_logs()
-            
-            # Update logs info label
-            self.logs_info_label.config(text=f"Saved logs: {len(self.time_logs)}")
-            
-            # Reset the timer and buttons
-            self.timer_label.config(text="00:00:00")
-            self.start_btn.config(state='normal', text='Start')
-            self.pause_btn.config(state='disabled')
-            self.stop_btn.config(state='disabled')
-            self.start_time = None
-            
-            # Clear the comment field for next entry
-            self.comment_entry.delete(0, tk.END)
+    @timed("ui.stop")
+    def stop_timer(self, session_id):
+        """Stop a timer and save its log"""
+        timer = self.timers.pop(session_id)
+        session = timer.session
+        if session.running:
+            self.checkpoint.pause(session)
+        self.ticks.remove(session_id)
+        timer.destroy()
+        if not self.timers:
+            self.no_timers_label.pack()
+        
+        # Append the new entry to the log store for persistence (updates the logs count when done)
+        self.save_time_logs(session.to_log(session.details, time.time()), session)
 
-    def update_timer(self):
-        if self.running:
-            elapsed = int(time.time() - self.start_time)
-            hours = elapsed // 3600
-            minutes = (elapsed % 3600) // 60
-            seconds = elapsed % 60
-            self.timer_label.config(text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-            self.current_timer = self.root.after(1000, self.update_timer)
+    def schedule_checkpoint(self):
+        """Start the periodic checkpoints if they aren't running yet"""
+        if self.checkpoint_job is None:
+            self.checkpoint_job = self.root.after(CHECKPOINT_INTERVAL_MS, self.checkpoint_sessions)
 
-    def export_logs(self, format_type="csv", period="daily"):
-        if not self.time_logs:
-            messagebox.showinfo("Info", "No time logs to export!")
+    def checkpoint_sessions(self):
+        """Periodically record the running segments so a crash loses little time"""
+        self.checkpoint_job = None
+        running = [timer.session for timer in self.timers.values() if timer.session.running]
+        for session in running:
+            self.checkpoint.checkpoint(session)
+        if running:
+            self.schedule_checkpoint()
+
+    def on_window_mapped(self, event):
+        """Resume ticking when the window is shown again"""
+        if event.widget is self.root:
+            self.ticks.wake()
+
+    def export_range(self, format_type):
+        """Export the logs between the dates entered in the Date Range fields"""
+        try:
+            start_date = parse_date(self.range_start_entry.get().strip())
+            end_date = parse_date(self.range_end_entry.get().strip())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the date range as YYYY-MM-DD.")
+            return
+        if start_date > end_date:
+            messagebox.showerror("Error", "The start date must not be after the end date.")
             return
+        self.export_logs(format_type, "range", start_date, end_date)
+
+    def export_logs(self, format_type="csv", period="daily", start_date=None, end_date=None):
+        from reports import EMPTY_PERIOD_MESSAGES, export_period, write_export
         
-        # Filter logs based on period
-        logs_to_export = []
-        today = datetime.now().date()
+        if not self.log_store.count():
+            messagebox.showinfo("Info", "No time logs to export!")
+            return
         
-        if period == "daily":
-            # Filter logs for today
-            logs_to_export = [log for log in self.time_logs 
-                             if datetime.strptime(log['Date'], '%Y-%m-%d').date() == today]
-            period_str = f"daily_{today.strftime('%Y-%m-%d')}"
-            if not logs_to_export:
-                messagebox.showinfo("Info", "No time logs for today!")
-                return
-                
-        elif period == "weekly":
-            # Calculate the start of the current week (Monday)
-            start_of_week = today - timedelta(days=today.weekday())
-            # Calculate the end of the current week (Sunday)
-            end_of_week = start_of_week + timedelta(days=6)
-            # Filter logs for this week
-            logs_to_export = [log for log in self.time_logs 
-                             if datetime.strptime(log['Date'], '%Y-%m-%d').date() >= start_of_week and
-                                datetime.strptime(log['Date'], '%Y-%m-%d').date() <= end_of_week]
-            period_str = f"weekly_{start_of_week.strftime('%Y-%m-%d')}_to_{end_of_week.strftime('%Y-%m-%d')}"
-            if not logs_to_export:
-                messagebox.showinfo("Info", "No time logs for this week!")
-                return
-        
-        # Create a DataFrame from filtered time logs
-        logs_df = pd.DataFrame(logs_to_export)
-        
-        # Add formatted duration (HH:MM:SS)
-        if 'Duration (seconds)' in logs_df.columns:
-            logs_df['Duration (HH:MM:SS)'] = logs_df['Duration (seconds)'].apply(
-                lambda x: f"{x//3600:02d}:{(x%3600)//60:02d}:{x%60:02d}")
-        
-        # For cleaner output, drop timestamp column which is only for internal use
-        if 'Timestamp' in logs_df.columns:
-            logs_df = logs_df.drop(columns=['Timestamp'])
+        # Filter logs based on period (the export job reads them, after any pending saves)
+        start_date, end_date, period_str = export_period(period, start_date=start_date, end_date=end_date)
+        if not self.log_store.count_range(start_date, end_date):
+            messagebox.showinfo("Info", EMPTY_PERIOD_MESSAGES[period])
+            return
         
         # Choose file path for export
         if format_type == "csv":
@@ -442,15 +659,18 @@ class TimeTrackerApp:
             )
             
             if file_path:
-                # Export detailed logs as CSV
-                logs_df.to_csv(file_path, index=False)
-                
-                # Create weekly summary timesheet-like format
-                self.export_weekly_summary(logs_to_export, file_path.replace('.csv', '_weekly_summary.csv'), "csv")
-                
-                messagebox.showinfo("Success", 
-                                   f"Time logs exported to {os.path.basename(file_path)}\n"
-                                   f"Weekly summary exported to {os.path.basename(file_path.replace('.csv', '_weekly_summary.csv'))}")
+                # Detailed logs plus a weekly summary CSV next to them, written in the background
+                self.jobs.submit(
+                    lambda progress: write_export(self.log_store.iter_range(start_date, end_date),
+                                                  file_path, "csv", progress),
+                    on_progress=self.show_status,
+                    on_done=lambda summary_path: messagebox.showinfo(
+                        "Success",
+                        f"Time logs exported to {os.path.basename(file_path)}\n"
+                        f"Weekly summary exported to {os.path.basename(summary_path)}"),
+                    on_error=self.on_export_error,
+                    status="Exporting time logs..."
+                )
                 
         elif format_type == "excel":
             default_filename = f"time_logs_{period_str}.xlsx"
@@ -462,131 +682,49 @@ class TimeTrackerApp:
             )
             
             if file_path:
-                # Export as Excel with multiple sheets
-                with pd.ExcelWriter(file_path) as writer:
-                    logs_df.to_excel(writer, sheet_name='Detailed Logs', index=False)
-                    
-                    # Add weekly timesheet-like format
-                    self.export_weekly_summary(logs_to_export, writer, "excel")
-                
-                messagebox.showinfo("Success", 
-                                   f"Time logs exported to {os.path.basename(file_path)}\n"
-                                   f"(Includes both detailed logs and weekly summary)")
-    
-    def export_weekly_summary(self, logs, output, format_type):
-        """Create a weekly summary similar to the timesheet image"""
-        if not logs:
+                # Export as Excel with multiple sheets, written in the background
+                self.jobs.submit(
+                    lambda progress: write_export(self.log_store.iter_range(start_date, end_date),
+                                                  file_path, "excel", progress),
+                    on_progress=self.show_status,
+                    on_done=lambda _: messagebox.showinfo(
+                        "Success",
+                        f"Time logs exported to {os.path.basename(file_path)}\n"
+                        f"(Includes both detailed logs and weekly summary)"),
+                    on_error=self.on_export_error,
+                    status="Exporting time logs..."
+                )
+
+    def export_analytics(self, format_type):
+        """Export hours per deal, company and deal owner for the current quarter"""
+        from reports import EMPTY_PERIOD_MESSAGES, export_period, write_analytics
+        
+        start_date, end_date, period_str = export_period("quarterly")
+        if not self.log_store.count_range(start_date, end_date):
+            messagebox.showinfo("Info", EMPTY_PERIOD_MESSAGES["quarterly"])
             return
         
-        # Get the date range for the week
-        dates = [datetime.strptime(log['Date'], '%Y-%m-%d').date() for log in logs]
-        min_date = min(dates)
-        max_date = max(dates)
-        
-        # Create a date range for the full week (Monday to Sunday)
-        start_of_week = min_date - timedelta(days=min_date.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-        date_range = [start_of_week + timedelta(days=i) for i in range(7)]
-        
-        # Create column headers with weekday names and dates
-        weekdays = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
-        # Get the actual month abbreviation from the date range
-        date_headers = [f"{d.strftime('%b').upper()} {d.day}" for d in date_range]
-        
-        # Group logs by activity and date
-        activity_time = defaultdict(lambda: defaultdict(int))
-        for log in logs:
-            activity = log['Activity']
-            log_date = datetime.strptime(log['Date'], '%Y-%m-%d').date()
-            weekday_idx = (log_date - start_of_week).days
-            if 0 <= weekday_idx < 7:  # Ensure it's within our week
-                duration_seconds = log['Duration (seconds)']
-                activity_time[activity][weekday_idx] += duration_seconds
-        
-        # Create a list to hold the data for the DataFrame
-        data = []
-        
-        # Aggregate attendance hours (total per day)
-        daily_totals = [0] * 7
-        for activity, day_durations in activity_time.items():
-            for day_idx, duration in day_durations.items():
-                daily_totals[day_idx] += duration
-        
-        # Convert seconds to hours:minutes format
-        attendance_row = ['ATTENDANCE HOURS']
-        for day_total in daily_totals:
-            hours = day_total // 3600
-            minutes = (day_total % 3600) // 60
-            attendance_row.append(f"{hours}h {minutes}m" if day_total > 0 else "0h 0m")
-        
-        # Add placeholder for TASK TOTAL column
-        attendance_row.append("")  # Task total for attendance
-        data.append(attendance_row)
-        
-        # Add a blank row
-        data.append([""] * 9)
-        
-        # Add activity rows with time entries
-        task_totals = {}
-        
-        for activity in sorted(activity_time.keys()):
-            row = [activity]
-            total_activity_seconds = 0
-            
-            for day_idx in range(7):
-                duration_seconds = activity_time[activity].get(day_idx, 0)
-                total_activity_seconds += duration_seconds
-                
-                if duration_seconds > 0:
-                    hours = duration_seconds // 3600
-                    minutes = (duration_seconds % 3600) // 60
-                    row.append(f"{hours}:{minutes:02d}")
-                else:
-                    row.append("0:00")
-            
-            # Calculate task total (HH:MM)
-            hours = total_activity_seconds // 3600
-            minutes = (total_activity_seconds % 3600) // 60
-            task_total = f"{hours}:{minutes:02d}"
-            row.append(task_total)
-            
-            data.append(row)
-            
-            # Add comment rows - populate from comments if available
-            comment_row = ["COMMENT"] + [""] * 8
-            data.append(comment_row)
-        
-        # Calculate weekly total in seconds
-        weekly_total_seconds = sum(daily_totals)
-        hours = weekly_total_seconds // 3600
-        minutes = (weekly_total_seconds % 3600) // 60
-        weekly_total = f"{hours}:{minutes:02d}"
-        
-        # Add a row for totals
-        totals_row = ["Total hours/day"]
-        for day_total in daily_totals:
-            hours = day_total // 3600
-            minutes = (day_total % 3600) // 60
-            totals_row.append(f"{hours}:{minutes:02d}")
-        totals_row.append(weekly_total)
-        data.append(totals_row)
-        
-        # Create column headers
-        columns = ['PROJECTS'] + date_headers + ['TASK TOTAL\nHRS/WEEK']
-        
-        # Create the DataFrame
-        summary_df = pd.DataFrame(data, columns=columns)
-        
-        # Export the summary
-        if format_type == "csv":
-            summary_df.to_csv(output, index=False)
-        else:  # Excel
-            # Adjust column widths for better display
-            summary_df.to_excel(output, sheet_name='Weekly Timesheet', index=False)
-            worksheet = output.sheets['Weekly Timesheet']
-            
-            # In a complete implementation, you would add Excel formatting here
-            # such as column widths, cell styles, etc.
+        extension = ".csv" if format_type == "csv" else ".xlsx"
+        filetypes = [("CSV files", "*.csv")] if format_type == "csv" else [("Excel files", "*.xlsx")]
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            filetypes=filetypes + [("All files", "*.*")],
+            initialfile=f"effort_analytics_{period_str}{extension}"
+        )
+        
+        if file_path:
+            # Totals come from the precomputed rollups, no logs are read
+            self.jobs.submit(
+                lambda: write_analytics(self.log_store.rollups(), start_date, end_date, file_path, format_type),
+                on_done=lambda _: messagebox.showinfo(
+                    "Success", f"Effort analytics exported to {os.path.basename(file_path)}"),
+                on_error=self.on_export_error,
+                status="Exporting analytics..."
+            )
+
+    def on_export_error(self, error):
+        """Report a failed export"""
+        messagebox.showerror("Error", f"Failed to export time logs: {str(error)}")
 
 if __name__ == "__main__":
     root = tk.Tk()
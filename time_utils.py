@@ -0,0 +1,73 @@
+"""Shared date parsing and duration formatting for timers, log records and exports
+
+Logs only ever hold a few hundred distinct 'YYYY-MM-DD' dates, so single
+dates are parsed through a bounded LRU cache and date columns are parsed
+once per distinct value. numpy and pandas are imported where they are
+used, keeping this module off the startup path's heavy imports.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+# Distinct date strings kept parsed, about 11 years of days
+DATE_CACHE_SIZE = 4096
+# date.toordinal() of 1970-01-01, where datetime64[D] counts from
+EPOCH_ORDINAL = 719163
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(text):
+    """date for a 'YYYY-MM-DD' string, raising ValueError if it isn't one"""
+    return datetime.strptime(text, '%Y-%m-%d').date()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def date_ordinal(text):
+    """Proleptic Gregorian ordinal (date.toordinal()) of a 'YYYY-MM-DD' string"""
+    return parse_date(text).toordinal()
+
+
+def parse_dates(dates):
+    """Parse a column of 'YYYY-MM-DD' strings into datetime64[D] values (NaT where missing)
+
+    Each distinct date string is parsed once. For the categorical Date
+    column of a log frame those are just its categories, so no per-row
+    work is done besides indexing by the category codes.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(dates.dtype, pd.CategoricalDtype):
+        codes, uniques = dates.cat.codes.to_numpy(), dates.cat.categories
+    else:
+        codes, uniques = pd.factorize(dates)
+    ordinals = np.fromiter((date_ordinal(str(text)) for text in uniques), dtype=np.int64, count=len(uniques))
+    # One extra NaT slot, which the missing value code -1 indexes
+    parsed = np.append((ordinals - EPOCH_ORDINAL).astype('datetime64[D]'), np.datetime64('NaT', 'D'))
+    return parsed[codes]
+
+
+def format_elapsed(seconds):
+    """HH:MM:SS for a whole number of seconds"""
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+def format_durations(seconds):
+    """Format an array (or Series) of second counts as 'HH:MM:SS'"""
+    import numpy as np
+
+    seconds = np.asarray(seconds, dtype=np.int64)
+    hours, minutes, secs = (np.char.mod('%02d', part)
+                            for part in (seconds // 3600, (seconds % 3600) // 60, seconds % 60))
+    return np.char.add(np.char.add(np.char.add(hours, ":"), np.char.add(minutes, ":")), secs)
+
+
+def format_hours_minutes(seconds, attendance=False):
+    """Format an array of second counts as 'H:MM' (or 'Hh Mm' for attendance rows)"""
+    import numpy as np
+
+    seconds = np.asarray(seconds, dtype=np.int64)
+    hours = (seconds // 3600).astype(str)
+    minutes = ((seconds % 3600) // 60).astype(str)
+    if attendance:
+        return np.char.add(np.char.add(hours, "h "), np.char.add(minutes, "m"))
+    return np.char.add(np.char.add(hours, ":"), np.char.zfill(minutes, 2))
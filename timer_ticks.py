@@ -0,0 +1,77 @@
+from time_utils import format_elapsed
+
+# Ticks land this long after the second boundary, so the new second is always shown
+TICK_SLACK_MS = 5
+
+
+def next_tick_delay_ms(elapsed):
+    """Milliseconds until just after the next whole second of `elapsed` (in seconds)
+
+    Scheduling each tick against the clock rather than a fixed 1000 ms
+    keeps the display from drifting by the callback's own run time.
+    """
+    return int((1.0 - elapsed % 1.0) * 1000) + TICK_SLACK_MS
+
+
+
+class TickScheduler:
+    """Redraws the elapsed time of every running timer from a single root.after chain
+
+    Each wakeup only reconfigures the labels whose text changed, then sleeps
+    until just after the next whole second of the first timer added, so a
+    lone timer ticks exactly on its seconds and further timers add no
+    wakeups of their own (their displays trail by under a second).
+    """
+
+    def __init__(self, root, is_hidden):
+        self.root = root
+        # Ticks stop while this returns True; wake() starts them again
+        self.is_hidden = is_hidden
+        self.timers = {}  # key -> (elapsed seconds callable, draw(text) callable)
+        self.shown = {}
+        self.job = None
+        # Wakeups vs. actual label redraws, to keep the ticking cheap
+        self.stats = {'ticks': 0, 'redraws': 0}
+
+    def add(self, key, elapsed, draw):
+        """Start ticking a timer, drawing it right away"""
+        self.timers[key] = (elapsed, draw)
+        self.shown.pop(key, None)
+        self.tick()
+
+    def remove(self, key):
+        """Stop ticking a timer"""
+        self.timers.pop(key, None)
+        self.shown.pop(key, None)
+        if not self.timers:
+            self.cancel()
+
+    def wake(self):
+        """Resume ticking if it stopped, e.g. when the window is shown again"""
+        if self.job is None and self.timers:
+            self.tick()
+
+    def cancel(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+    def tick(self):
+        self.cancel()
+        if not self.timers:
+            return
+        self.stats['ticks'] += 1
+        if self.is_hidden():
+            return
+
+        lead = None
+        for key, (elapsed, draw) in self.timers.items():
+            seconds = elapsed()
+            if lead is None:
+                lead = seconds
+            text = format_elapsed(int(seconds))
+            if text != self.shown.get(key):
+                draw(text)
+                self.shown[key] = text
+                self.stats['redraws'] += 1
+        self.job = self.root.after(next_tick_delay_ms(lead), self.tick)
@@ -0,0 +1,200 @@
+"""Formatted Excel timesheets for openpyxl's write-only workbooks
+
+Hours are written as numbers (fractions of a day) shown as [h]:mm, and
+the task, daily and user totals are SUM formulas, so a timesheet stays
+consistent when an entry is corrected by hand. Cell formatting comes from
+a few named styles registered once per workbook, and each kind of row is
+written through a RowTemplate that styles its cells once and is reused
+for every row of that kind, which keeps multi-week, multi-user workbooks
+fast to write.
+"""
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+SECONDS_PER_DAY = 86400
+HOURS_FORMAT = '[h]:mm'
+ATTENDANCE_FORMAT = '[h]"h" mm"m"'
+
+# Column widths of the detailed logs sheet; other columns get DEFAULT_WIDTH
+DETAIL_WIDTHS = {
+    'Date': 12,
+    'Record Id': 24,
+    'Deal Name': 40,
+    'Company Name': 30,
+    'Deal Owner': 20,
+    'Role': 14,
+    'Activity': 34,
+    'Comment': 40,
+    'Duration (HH:MM:SS)': 14,
+}
+DEFAULT_WIDTH = 12
+
+
+def timesheet_styles():
+    """The named styles timesheet cells refer to"""
+    thin = Side(style='thin', color='BFBFBF')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    total_fill = PatternFill('solid', fgColor='DDEBF7')
+    centered = Alignment(horizontal='center', vertical='center')
+    return [
+        NamedStyle('Header', font=Font(bold=True, color='FFFFFF'), fill=PatternFill('solid', fgColor='1F4E78'),
+                   alignment=Alignment(horizontal='center', vertical='center', wrap_text=True), border=border),
+        NamedStyle('Row Label', font=Font(bold=True), border=border, alignment=Alignment(vertical='top')),
+        NamedStyle('Cell', border=border, alignment=Alignment(vertical='top')),
+        NamedStyle('Hours', number_format=HOURS_FORMAT, border=border, alignment=centered),
+        NamedStyle('Attendance', font=Font(bold=True), number_format=ATTENDANCE_FORMAT, border=border,
+                   alignment=centered),
+        NamedStyle('Total Label', font=Font(bold=True), fill=total_fill, border=border),
+        NamedStyle('Total Hours', font=Font(bold=True), fill=total_fill, number_format=HOURS_FORMAT, border=border,
+                   alignment=centered),
+        NamedStyle('Decimal Hours', number_format='0.00'),
+        NamedStyle('Comment', font=Font(italic=True, color='595959'), border=border,
+                   alignment=Alignment(vertical='top', wrap_text=True)),
+    ]
+
+
+def add_timesheet_styles(workbook):
+    """Register the timesheet named styles with a workbook, if they aren't yet"""
+    existing = set(workbook.named_styles)
+    for style in timesheet_styles():
+        if style.name not in existing:
+            workbook.add_named_style(style)
+
+
+class RowTemplate:
+    """One reusable row of styled write-only cells
+
+    A write-only worksheet serializes a row as soon as it is appended, so
+    the same styled cells can carry the values of every row of one kind.
+    """
+
+    def __init__(self, worksheet, styles):
+        self.worksheet = worksheet
+        self.cells = []
+        for style in styles:
+            cell = WriteOnlyCell(worksheet)
+            if style is not None:
+                cell.style = style
+            self.cells.append(cell)
+
+    def append(self, values):
+        for cell, value in zip(self.cells, values):
+            cell.value = value
+        self.worksheet.append(self.cells)
+
+
+class TimesheetSheet:
+    """A write-only worksheet that keeps count of its rows and one RowTemplate per row style"""
+
+    def __init__(self, workbook, title, widths, freeze_panes=None):
+        add_timesheet_styles(workbook)
+        self.worksheet = workbook.create_sheet(title)
+        # Column widths and panes have to be set before the first row is written
+        for index, width in enumerate(widths, 1):
+            self.worksheet.column_dimensions[get_column_letter(index)].width = width
+        if freeze_panes:
+            self.worksheet.freeze_panes = freeze_panes
+        self.rows = 0
+        self._templates = {}
+
+    def append(self, styles, values):
+        """Append a row of values styled by the matching names, returning its row number"""
+        styles = tuple(styles)
+        template = self._templates.get(styles)
+        if template is None:
+            template = self._templates[styles] = RowTemplate(self.worksheet, styles)
+        template.append(values)
+        self.rows += 1
+        return self.rows
+
+    def append_blank(self):
+        self.worksheet.append([])
+        self.rows += 1
+        return self.rows
+
+
+def set_column_widths(worksheet, columns, widths=DETAIL_WIDTHS):
+    """Size the columns of a write-only worksheet by their header names (before any row is written)"""
+    for index, column in enumerate(columns, 1):
+        worksheet.column_dimensions[get_column_letter(index)].width = widths.get(column, DEFAULT_WIDTH)
+
+
+def hours(seconds):
+    """Excel time value (fraction of a day) for a number of seconds"""
+    return int(seconds) / SECONDS_PER_DAY
+
+
+def sum_formula(column, first_row, last_row):
+    return f"=SUM({column}{first_row}:{column}{last_row})" if first_row <= last_row else 0
+
+
+def write_weekly_timesheet(workbook, sheet_name, week, first_column, total_column):
+    """Write a formatted weekly timesheet sheet for a reports.WeekGrid
+
+    Layout as in the CSV summary: attendance, then every activity followed
+    by its COMMENT row, then the daily totals. Task and daily totals are
+    SUM formulas over the hour cells and the attendance row refers to the
+    daily totals.
+    """
+    sheet = TimesheetSheet(workbook, sheet_name, [40] + [12] * 7 + [14], freeze_panes='B2')
+    days = [get_column_letter(column) for column in range(2, 9)]
+
+    sheet.append(['Header'] * 9, [first_column] + list(week.date_headers) + [total_column])
+    first_row = 4
+    totals_row = first_row + 2 * len(week.activities)
+    sheet.append(['Row Label'] + ['Attendance'] * 7 + ['Cell'],
+                 ['ATTENDANCE HOURS'] + [f"={day}{totals_row}" for day in days] + [None])
+    sheet.append_blank()
+
+    for activity, seconds, comments in zip(week.activities, week.seconds, week.comments):
+        row = sheet.rows + 1
+        sheet.append(['Row Label'] + ['Hours'] * 7 + ['Total Hours'],
+                     [activity] + [hours(value) for value in seconds] + [f"=SUM(B{row}:H{row})"])
+        sheet.append(['Row Label'] + ['Comment'] * 7 + ['Cell'],
+                     ["COMMENT"] + [comment or None for comment in comments] + [None])
+
+    sheet.append(['Total Label'] + ['Total Hours'] * 8,
+                 ["Total hours/day"] + [sum_formula(day, first_row, totals_row - 1) for day in days]
+                 + [f"=SUM(B{totals_row}:H{totals_row})"])
+    return sheet
+
+
+def write_team_timesheet(workbook, sheet_name, week, total_column, user_total_label="Total hours/day"):
+    """Write a formatted team timesheet sheet for a team_report.TeamWeekGrid
+
+    Every user's rows are followed by their total row (SUM formulas), and
+    the team total row adds up the user total rows with SUMIF.
+    """
+    sheet = TimesheetSheet(workbook, sheet_name, [18, 34, 45] + [10] * 7 + [14], freeze_panes='D2')
+    days = [get_column_letter(column) for column in range(4, 11)]
+    hour_styles = ['Hours'] * 7
+
+    sheet.append(['Header'] * 11, ['USER', 'ACTIVITY', 'OPPORTUNITY'] + list(week.date_headers) + [total_column])
+    first_row = 4
+    # Each user takes their rows plus a total row and a blank row
+    team_row = first_row + sum(len(rows) + 2 for _, rows in week.users)
+    sheet.append(['Row Label', 'Cell', 'Cell'] + ['Attendance'] * 7 + ['Cell'],
+                 ['TEAM ATTENDANCE HOURS', None, None] + [f"={day}{team_row}" for day in days] + [None])
+    sheet.append_blank()
+
+    for user, rows in week.users:
+        user_first = sheet.rows + 1
+        for activity, opportunity, seconds in rows:
+            row = sheet.rows + 1
+            sheet.append(['Row Label', 'Cell', 'Cell'] + hour_styles + ['Total Hours'],
+                         [user, activity, opportunity] + [hours(value) for value in seconds]
+                         + [f"=SUM(D{row}:J{row})"])
+        total_row = sheet.rows + 1
+        sheet.append(['Total Label'] * 3 + ['Total Hours'] * 8,
+                     [user, user_total_label, None] + [sum_formula(day, user_first, total_row - 1) for day in days]
+                     + [f"=SUM(D{total_row}:J{total_row})"])
+        sheet.append_blank()
+
+    last_row = team_row - 1
+    sheet.append(['Total Label'] * 3 + ['Total Hours'] * 8,
+                 ["Team total hours/day", None, None]
+                 + [f'=SUMIF($B${first_row}:$B${last_row},"{user_total_label}",{day}{first_row}:{day}{last_row})'
+                    for day in days]
+                 + [f"=SUM(D{team_row}:J{team_row})"])
+    return sheet
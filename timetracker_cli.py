@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Headless command line interface for Time Tracker
+
+Exports and summaries run straight from the log stores, without tkinter,
+so they can be scheduled (e.g. nightly from cron) on a machine with no
+display. Several log directories can be processed in one invocation:
+
+    python timetracker_cli.py export --period weekly --format xlsx --out exports/ \\
+        --store /data/alice --store /data/bob
+    python timetracker_cli.py summary --from 2025-03-01 --to 2025-03-31
+    python timetracker_cli.py import-crm deals.xlsx
+    python timetracker_cli.py team-report /data/team --from 2025-03-01 --to 2025-03-31
+    python timetracker_cli.py analytics --period quarterly --out effort.xlsx
+    python timetracker_cli.py metrics
+    python timetracker_cli.py sync --url http://localhost:8765/logs
+
+pandas is only imported by the commands that need it, to keep startup fast.
+"""
+import argparse
+import getpass
+import os
+import sys
+
+import instrumentation
+from app_paths import crm_data_path, get_app_data_dir
+from log_store import open_log_store
+import time_utils
+
+
+def parse_date(value):
+    try:
+        return time_utils.parse_date(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+
+
+def store_name(store_dir):
+    """Short name for a log directory, used to tell users apart in outputs"""
+    return os.path.basename(os.path.normpath(store_dir))
+
+
+def resolve_period(args):
+    """(period, start_date, end_date) from the --period/--from/--to options"""
+    if args.start_date or args.end_date:
+        if not (args.start_date and args.end_date):
+            raise SystemExit("error: --from and --to must be given together")
+        if args.start_date > args.end_date:
+            raise SystemExit("error: --from must not be after --to")
+        return "range", args.start_date, args.end_date
+    return args.period, None, None
+
+
+def iter_stores(args):
+    """Yield (store_dir, loaded store) for every --store, skipping unreadable ones"""
+    for store_dir in args.stores or [get_app_data_dir()]:
+        store = open_log_store(store_dir, engine=args.engine, read_only=True)
+        try:
+            store.load()
+        except Exception as e:
+            print(f"{store_dir}: failed to load time logs: {e}", file=sys.stderr)
+            continue
+        for error in store.load_errors:
+            print(f"{store_dir}: {error}", file=sys.stderr)
+        try:
+            yield store_dir, store
+        finally:
+            store.close()
+
+
+def output_path(args, store_dir, period_str, extension, multiple, prefix="time_logs"):
+    """Where the export for store_dir goes"""
+    out = args.out or os.getcwd()
+    if not multiple and not os.path.isdir(out) and os.path.splitext(out)[1]:
+        return out
+    os.makedirs(out, exist_ok=True)
+    prefix = f"{prefix}_{store_name(store_dir)}" if multiple else prefix
+    return os.path.join(out, f"{prefix}_{period_str}{extension}")
+
+
+def cmd_export(args):
+    from reports import EMPTY_PERIOD_MESSAGES, export_period, write_export
+
+    period, start_date, end_date = resolve_period(args)
+    start_date, end_date, period_str = export_period(period, start_date=start_date, end_date=end_date)
+    format_type = "csv" if args.format == "csv" else "excel"
+    extension = ".csv" if args.format == "csv" else ".xlsx"
+    multiple = len(args.stores or []) > 1
+
+    status = 0
+    for store_dir, store in iter_stores(args):
+        if not store.count_range(start_date, end_date):
+            print(f"{store_dir}: {EMPTY_PERIOD_MESSAGES[period]}", file=sys.stderr)
+            continue
+        file_path = output_path(args, store_dir, period_str, extension, multiple)
+        try:
+            # Streamed in chunks, so large histories export in bounded memory
+            summary_path = write_export(store.iter_range(start_date, end_date), file_path, format_type)
+        except Exception as e:
+            print(f"{store_dir}: failed to export: {e}", file=sys.stderr)
+            status = 1
+            continue
+        print(file_path)
+        if summary_path:
+            print(summary_path)
+    return status
+
+
+def cmd_summary(args):
+    import pandas as pd
+    from reports import EMPTY_PERIOD_MESSAGES, build_weekly_summary, export_period, split_iso_weeks
+
+    period, start_date, end_date = resolve_period(args)
+    start_date, end_date, _ = export_period(period, start_date=start_date, end_date=end_date)
+
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', None):
+        for store_dir, store in iter_stores(args):
+            logs = store.range(start_date, end_date)
+            if not logs:
+                print(f"{store_dir}: {EMPTY_PERIOD_MESSAGES[period]}", file=sys.stderr)
+                continue
+            for (iso_year, iso_week), week_df in split_iso_weeks(logs.to_frame()):
+                print(f"== {store_name(store_dir)} - week {iso_year}-W{iso_week:02d} ==")
+                summary_df = build_weekly_summary(week_df)
+                summary_df.columns = [column.replace("\n", " ") for column in summary_df.columns]
+                print(summary_df.to_string(index=False))
+                print()
+    return 0
+
+
+def cmd_analytics(args):
+    from reports import EMPTY_PERIOD_MESSAGES, export_period, write_analytics
+
+    period, start_date, end_date = resolve_period(args)
+    start_date, end_date, period_str = export_period(period, start_date=start_date, end_date=end_date)
+    format_type = "csv" if args.format == "csv" else "excel"
+    extension = ".csv" if args.format == "csv" else ".xlsx"
+    multiple = len(args.stores or []) > 1
+
+    for store_dir, store in iter_stores(args):
+        if not store.count_range(start_date, end_date):
+            print(f"{store_dir}: {EMPTY_PERIOD_MESSAGES[period]}", file=sys.stderr)
+            continue
+        file_path = output_path(args, store_dir, period_str, extension, multiple, prefix="effort_analytics")
+        write_analytics(store.rollups(), start_date, end_date, file_path, format_type)
+        print(file_path)
+    return 0
+
+
+def cmd_team_report(args):
+    from reports import EMPTY_PERIOD_MESSAGES, export_period
+    from team_report import aggregate_team, export_team_report
+
+    period, start_date, end_date = resolve_period(args)
+    start_date, end_date, period_str = export_period(period, start_date=start_date, end_date=end_date)
+    totals_df, errors = aggregate_team(args.team_dir, start_date, end_date, engine=args.engine,
+                                       max_workers=args.workers)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if totals_df.empty:
+        print(f"{args.team_dir}: {EMPTY_PERIOD_MESSAGES[period]}", file=sys.stderr)
+        return 1 if errors else 0
+
+    extension = ".csv" if args.format == "csv" else ".xlsx"
+    file_path = args.out or f"team_timesheet_{period_str}{extension}"
+    if os.path.isdir(file_path):
+        file_path = os.path.join(file_path, f"team_timesheet_{period_str}{extension}")
+    export_team_report(totals_df, file_path, "csv" if args.format == "csv" else "excel")
+    print(file_path)
+    return 1 if errors else 0
+
+
+def cmd_import_crm(args):
+    from crm_cache import import_crm_file, load_crm_frame
+    from deal_index import deals_from_frame, diff_deals, format_opportunity
+
+    data_dir = args.data_dir or get_app_data_dir()
+    crm_data_file = crm_data_path(data_dir)
+    try:
+        # The deals installed so far, to report what the new file changes
+        old_deals = deals_from_frame(load_crm_frame(crm_data_file)) if os.path.exists(crm_data_file) else None
+    except (OSError, ValueError) as e:
+        print(f"error: failed to read the installed CRM data {crm_data_file}: {e}", file=sys.stderr)
+        return 1
+    try:
+        df = import_crm_file(args.file, crm_data_file)
+    except (OSError, ValueError) as e:
+        # Missing or unreadable file, not a workbook, or missing columns (InvalidCRMFile)
+        print(f"error: failed to import {args.file}: {e}", file=sys.stderr)
+        return 1
+    print(f"Imported {len(df)} deals into {crm_data_file}")
+    if old_deals is None:
+        return 0
+    changes = diff_deals(old_deals, deals_from_frame(df))
+    print(f"Changes: {changes.summary()}")
+    if changes.deleted:
+        # Removed deals that time was logged against, as the app reports them
+        store = open_log_store(data_dir, engine=args.engine, read_only=True)
+        try:
+            store.load()
+            logged_deals = store.rollups().deal_names
+        finally:
+            store.close()
+        for error in store.load_errors:
+            print(f"{data_dir}: {error}", file=sys.stderr)
+        orphaned = sorted(record_id for record_id in changes.deleted if record_id in logged_deals)
+        if orphaned:
+            print("These deals have logged time but are no longer in the CRM data:")
+            for record_id in orphaned:
+                print(f"  {format_opportunity(logged_deals[record_id], record_id)}")
+    return 0
+
+
+def cmd_metrics(args):
+    from instrumentation import METRICS_ENV_VAR, format_histogram, summarize_metrics
+
+    data_dir = args.data_dir or get_app_data_dir()
+    stats, profiles = summarize_metrics(data_dir)
+    if not stats:
+        print(f"No metrics recorded in {data_dir}. Run the app with {METRICS_ENV_VAR}=1 to record them.",
+              file=sys.stderr)
+        return 1
+    print(f"{'operation':<20} {'count':>7} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}  histogram")
+    for stat in stats:
+        print(f"{stat['operation']:<20} {stat['count']:>7} {stat['mean_ms']:>10.1f} {stat['p50_ms']:>10.1f} "
+              f"{stat['p95_ms']:>10.1f} {stat['max_ms']:>10.1f}  {format_histogram(stat['histogram'])}")
+    for path in profiles:
+        print(f"\nProfile dump: {path}\n  view with: python -m pstats {path}")
+    return 0
+
+
+def cmd_sync(args):
+    from sync_client import SYNC_URL_ENV_VAR, SYNC_USER_ENV_VAR, SyncClient
+
+    url = args.url or os.environ.get(SYNC_URL_ENV_VAR)
+    if not url:
+        print(f"error: give --url or set {SYNC_URL_ENV_VAR}", file=sys.stderr)
+        return 1
+    data_dir = args.data_dir or get_app_data_dir()
+    # Only read: a writable store could compact the journal under a running app's feet
+    store = open_log_store(data_dir, engine=args.engine, read_only=True)
+    try:
+        store.load()
+        client = SyncClient(data_dir, store, url,
+                            args.user or os.environ.get(SYNC_USER_ENV_VAR) or getpass.getuser())
+        try:
+            uploaded = client.sync()
+        except Exception as e:
+            print(f"error: sync failed, {len(client.pending_batches())} batch(es) stay queued: {e}",
+                  file=sys.stderr)
+            return 1
+    finally:
+        store.close()
+    print(f"Uploaded {uploaded} logs to {url} ({client.cursor} synced in total)")
+    if client.last_error:
+        print(f"warning: {client.last_error}", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="timetracker", description="Time Tracker command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_period_options(subparser, default_period="weekly"):
+        subparser.add_argument("--period", choices=["daily", "weekly", "quarterly"], default=default_period,
+                               help=f"export today's, this week's or this quarter's logs (default: {default_period})")
+        subparser.add_argument("--from", dest="start_date", type=parse_date,
+                               help="first day of a custom date range (YYYY-MM-DD)")
+        subparser.add_argument("--to", dest="end_date", type=parse_date,
+                               help="last day of a custom date range (YYYY-MM-DD)")
+        subparser.add_argument("--engine", choices=["journal", "sqlite"],
+                               help="storage engine of the log directories (default: $TIMETRACKER_STORAGE or journal)")
+
+    def add_log_options(subparser, default_period="weekly"):
+        add_period_options(subparser, default_period)
+        subparser.add_argument("--store", dest="stores", action="append", metavar="DIR",
+                               help="log directory to read, may be repeated (default: this user's data directory)")
+
+    export_parser = subparsers.add_parser("export", help="export detailed logs and weekly timesheets")
+    add_log_options(export_parser)
+    export_parser.add_argument("--format", choices=["csv", "xlsx"], default="xlsx")
+    export_parser.add_argument("--out", help="output file, or directory when exporting several stores")
+    export_parser.set_defaults(func=cmd_export)
+
+    summary_parser = subparsers.add_parser("summary", help="print the weekly timesheet summary")
+    add_log_options(summary_parser)
+    summary_parser.set_defaults(func=cmd_summary)
+
+    analytics_parser = subparsers.add_parser("analytics", help="export hours per deal, company and deal owner")
+    add_log_options(analytics_parser, default_period="quarterly")
+    analytics_parser.add_argument("--format", choices=["csv", "xlsx"], default="xlsx")
+    analytics_parser.add_argument("--out", help="output file, or directory when exporting several stores")
+    analytics_parser.set_defaults(func=cmd_analytics)
+
+    team_parser = subparsers.add_parser("team-report", help="build a team timesheet from many users' log directories")
+    team_parser.add_argument("team_dir", help="directory holding one log directory per user")
+    add_period_options(team_parser)
+    team_parser.add_argument("--format", choices=["csv", "xlsx"], default="xlsx")
+    team_parser.add_argument("--out", help="output file or directory")
+    team_parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    team_parser.set_defaults(func=cmd_team_report)
+
+    metrics_parser = subparsers.add_parser("metrics", help="summarize the timings recorded with TIMETRACKER_METRICS=1")
+    metrics_parser.add_argument("--data-dir", help="app data directory holding the metrics (default: this user's)")
+    metrics_parser.set_defaults(func=cmd_metrics)
+
+    import_parser = subparsers.add_parser("import-crm", help="validate and install a CRM workbook")
+    import_parser.add_argument("file", help="CRM Excel file")
+    import_parser.add_argument("--data-dir", help="app data directory to install it in (default: this user's)")
+    import_parser.add_argument("--engine", choices=["journal", "sqlite"],
+                               help="storage engine of the data directory, whose logs are checked for removed "
+                                    "deals (default: $TIMETRACKER_STORAGE or journal)")
+    import_parser.set_defaults(func=cmd_import_crm)
+
+    sync_parser = subparsers.add_parser("sync", help="upload logs not synced yet to a collector")
+    sync_parser.add_argument("--url", help="collector upload URL (default: $TIMETRACKER_SYNC_URL)")
+    sync_parser.add_argument("--user", help="user name to upload as (default: $TIMETRACKER_SYNC_USER or login)")
+    sync_parser.add_argument("--data-dir", help="app data directory to sync (default: this user's)")
+    sync_parser.add_argument("--engine", choices=["journal", "sqlite"],
+                             help="storage engine of the data directory (default: $TIMETRACKER_STORAGE or journal)")
+    sync_parser.set_defaults(func=cmd_sync)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.func is cmd_metrics:
+        return args.func(args)
+    # Commands are timed like the app's operations when metrics are enabled; only then is the
+    # data directory needed (and created), as --store/--data-dir runs may never touch this user's
+    if instrumentation.metrics_enabled():
+        instrumentation.configure(getattr(args, 'data_dir', None) or get_app_data_dir())
+    try:
+        return args.func(args)
+    finally:
+        instrumentation.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())